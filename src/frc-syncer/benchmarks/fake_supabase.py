@@ -0,0 +1,172 @@
+import json
+import time
+from threading import Lock
+
+
+class FakeResponse:
+    def __init__(self, data: list[dict]):
+        self.data = data
+
+
+class FakeQuery:
+    """Minimal PostgREST query builder backed by FakeSupabaseClient."""
+
+    def __init__(self, client: "FakeSupabaseClient", table: str):
+        self._client = client
+        self._table = table
+        self._method = "select"
+        self._rows: list[dict] = []
+        self._filters: list[tuple[str, object]] = []
+        self._prefixes: list[tuple[str, str]] = []
+        self._order: str | None = None
+        self._desc = False
+        self._range: tuple[int, int] | None = None
+        self._limit: int | None = None
+
+    def upsert(self, rows: list[dict], **kwargs) -> "FakeQuery":
+        self._method = "upsert"
+        self._rows = rows
+        return self
+
+    def insert(self, rows: list[dict], **kwargs) -> "FakeQuery":
+        self._method = "insert"
+        self._rows = rows
+        return self
+
+    def select(self, *columns: str) -> "FakeQuery":
+        self._method = "select"
+        return self
+
+    def eq(self, column: str, value) -> "FakeQuery":
+        self._filters.append((column, value))
+        return self
+
+    def like(self, column: str, pattern: str) -> "FakeQuery":
+        if not pattern.endswith("%") or "%" in pattern[:-1]:
+            raise NotImplementedError("Only prefix patterns are supported")
+        self._prefixes.append((column, pattern[:-1]))
+        return self
+
+    def order(self, column: str, desc: bool = False) -> "FakeQuery":
+        self._order = column
+        self._desc = desc
+        return self
+
+    def range(self, start: int, end: int) -> "FakeQuery":
+        # PostgREST ranges include their end.
+        self._range = (start, end + 1)
+        return self
+
+    def limit(self, count: int) -> "FakeQuery":
+        self._limit = count
+        return self
+
+    def _matches(self, row: dict) -> bool:
+        return all(
+            row.get(column) == value for column, value in self._filters
+        ) and all(
+            str(row.get(column)).startswith(prefix)
+            for column, prefix in self._prefixes
+        )
+
+    def execute(self) -> FakeResponse:
+        if self._method == "select":
+            data = self._client._select(self._table, self._matches)
+            if self._order:
+                data.sort(
+                    key=lambda row: row.get(self._order) or 0,
+                    reverse=self._desc,
+                )
+            if self._range:
+                start, stop = self._range
+                data = data[start:stop]
+            if self._limit is not None:
+                data = data[: self._limit]
+            return self._client._record(self._table, "select", [], data)
+
+        data = self._client._write(self._table, self._rows)
+        return self._client._record(
+            self._table, self._method, self._rows, data
+        )
+
+
+class FakeSupabaseClient:
+    """In-memory Supabase client that records calls and their sizes.
+
+    Upserts replace rows by the columns in `table_keys`; rows of tables
+    without keys are stored by their `id`, which is generated if missing.
+    """
+
+    def __init__(
+        self,
+        latency_secs: float = 0.0,
+        secs_per_mb: float = 0.0,
+        table_keys: dict[str, tuple[str, ...]] | None = None,
+    ):
+        self.latency_secs = latency_secs
+        self.secs_per_mb = secs_per_mb
+        self.table_keys = table_keys or {}
+        self.tables: dict[str, dict] = {}
+        self.calls: list[dict] = []
+        self._next_id = 1
+        self._lock = Lock()
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self, name)
+
+    def _select(self, table: str, predicate) -> list[dict]:
+        with self._lock:
+            return [
+                dict(row)
+                for row in self.tables.get(table, {}).values()
+                if predicate(row)
+            ]
+
+    def _write(self, table: str, rows: list[dict]) -> list[dict]:
+        written = []
+        with self._lock:
+            stored = self.tables.setdefault(table, {})
+            key_columns = self.table_keys.get(table)
+            for row in rows:
+                row = dict(row)
+                if key_columns:
+                    key = tuple(row[column] for column in key_columns)
+                else:
+                    if row.get("id") is None:
+                        row["id"] = self._next_id
+                        self._next_id += 1
+                    key = row["id"]
+                stored[key] = row
+                written.append(row)
+        return written
+
+    def _record(
+        self, table: str, method: str, rows: list[dict], data: list[dict]
+    ) -> FakeResponse:
+        request_bytes = len(json.dumps(rows)) if rows else 0
+        delay = self.latency_secs + self.secs_per_mb * request_bytes / 1e6
+        if delay:
+            time.sleep(delay)
+        with self._lock:
+            self.calls.append(
+                {
+                    "table": table,
+                    "method": method,
+                    "rows": len(rows),
+                    "bytes": request_bytes,
+                    "secs": delay,
+                }
+            )
+        return FakeResponse(data)
+
+    def reset_calls(self):
+        with self._lock:
+            self.calls.clear()
+
+    def summary(self) -> dict:
+        with self._lock:
+            return {
+                "calls": len(self.calls),
+                "rows": sum(call["rows"] for call in self.calls),
+                "bytes": sum(call["bytes"] for call in self.calls),
+            }
@@ -0,0 +1,126 @@
+"""Checks that importing the sync modules stays within a time budget.
+
+Run from `src/frc-syncer`:
+
+    python -m benchmarks.import_time --budget-ms 250
+
+Each module is imported with `-X importtime` in a fresh interpreter
+without Supabase or TBA credentials, after the baseline every flow pays
+anyway (`from prefect import flow, task`). Its cost is the summed self
+time of the modules the baseline did not load, taking each module's
+fastest run, so wall-clock noise from process startup stays out of it.
+Exits non-zero when a module goes over the budget, listing the slowest
+imports it pulled in, or when it loads one of the heavy modules that are
+only imported where they are used. tests/test_import_time.py checks the
+latter, since timings vary too much between machines to gate on.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+MODULES = (
+    "services.db_service",
+    "services.tba_service",
+    "tasks.sync_tba_year",
+    "flows.download_historic",
+    "flows.sync_live_events",
+)
+
+BASELINE = "from prefect import flow, task"
+
+BUDGET_MS = 250
+
+# Imported by the code that needs them, since not every run does.
+HEAVY_MODULES = ("supabase", "pyarrow", "psycopg")
+
+CREDENTIALS = ("SUPABASE_URL", "SUPABASE_KEY", "TBA_API_KEY")
+
+
+def _run(code: str) -> subprocess.CompletedProcess:
+    # Bytecode is left writable so that only the first run compiles.
+    env = {
+        name: value
+        for name, value in os.environ.items()
+        if name not in CREDENTIALS and name != "PYTHONDONTWRITEBYTECODE"
+    }
+    return subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=Path(__file__).parents[1],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def self_times(code: str, repeat: int) -> dict[str, int]:
+    """Returns the fastest self time in microseconds of each import."""
+    _run(code)
+    fastest = {}
+    for _ in range(repeat):
+        for line in _run(code).stderr.splitlines():
+            if not line.startswith("import time:") or "|" not in line:
+                continue
+            self_us, _, name = line.removeprefix("import time:").split("|")
+            if not self_us.strip().isdigit():
+                continue
+            name, self_us = name.strip(), int(self_us)
+            fastest[name] = min(self_us, fastest.get(name, self_us))
+    return fastest
+
+
+def import_costs(
+    module: str, baseline: str, loaded: set[str], repeat: int
+) -> dict[str, int]:
+    """Returns the self times of the imports `module` adds to `baseline`."""
+    times = self_times(f"{baseline}\nimport {module}", repeat)
+    return {
+        name: self_us for name, self_us in times.items() if name not in loaded
+    }
+
+
+def heavy_imports(module: str) -> list[str]:
+    """Returns the heavy modules that importing `module` loads."""
+    loaded = _run(f"import sys, {module}\nprint(*sys.modules)").stdout
+    return [name for name in HEAVY_MODULES if name in loaded.split()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=BUDGET_MS)
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("modules", nargs="*", default=MODULES)
+    args = parser.parse_args()
+
+    loaded = set(self_times(args.baseline, args.repeat))
+    print(f"{'module':<32}{'imports':>9}{'ms':>9}  heavy")
+    over_budget = {}
+    heavy = False
+    for module in args.modules:
+        costs = import_costs(module, args.baseline, loaded, args.repeat)
+        total_ms = sum(costs.values()) / 1000
+        heavy_names = [name for name in HEAVY_MODULES if name in costs]
+        heavy = heavy or bool(heavy_names)
+        print(
+            f"{module:<32}{len(costs):>9}{total_ms:>9.1f}  "
+            f"{', '.join(heavy_names) or '-'}"
+        )
+        if total_ms > args.budget_ms:
+            over_budget[module] = costs
+
+    for module, costs in over_budget.items():
+        print(f"\n{module} is over the {args.budget_ms:.0f}ms budget:")
+        slowest = sorted(costs.items(), key=lambda item: item[1])[-10:]
+        for name, self_us in reversed(slowest):
+            print(f"  {self_us / 1000:>8.1f}ms  {name}")
+
+    if over_budget or heavy:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Memory held by a season of matches in each in-memory representation.
+
+Run from `src/frc-syncer`:
+
+    python -m benchmarks.memory --events 60 --matches-per-event 120
+
+Each representation is built event by event from the raw JSON bodies, as
+a sync would, and kept alive; the report shows what it retains once the
+decoded payloads are gone. The ratio is relative to the models and rows
+that `upsert_event_matches` holds.
+"""
+
+import argparse
+import gc
+import json
+import tracemalloc
+
+from benchmarks import payloads
+from models.tba.match import Match
+from models.tba.match_batch import MatchBatch
+from utils.json_stream import iter_json_array
+
+
+def retained_bytes(build) -> tuple[int, object]:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = build()
+        gc.collect()
+        return tracemalloc.get_traced_memory()[0], result
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--year", type=int, default=2024)
+    parser.add_argument("--events", type=int, default=60)
+    parser.add_argument("--matches-per-event", type=int, default=120)
+    parser.add_argument("--breakdown-fields", type=int, default=40)
+    args = parser.parse_args()
+
+    bodies = [
+        json.dumps(
+            payloads.generate_matches(
+                f"{args.year}ev{index:03d}",
+                args.matches_per_event,
+                breakdown_fields=args.breakdown_fields,
+                seed=index,
+            )
+        ).encode()
+        for index in range(args.events)
+    ]
+
+    def models():
+        return [
+            [Match.from_tba(match) for match in json.loads(body)]
+            for body in bodies
+        ]
+
+    def models_and_rows():
+        # What upsert_event_matches holds: the models and their rows.
+        return [
+            (
+                matches,
+                [match.to_db() for match in matches],
+                [a.to_db() for match in matches for a in match.alliances],
+                [
+                    team.to_db()
+                    for match in matches
+                    for alliance in match.alliances
+                    for team in alliance.teams
+                ],
+            )
+            for matches in models()
+        ]
+
+    def rows():
+        return [
+            Match.rows_from_tba(list(iter_json_array([body])))
+            for body in bodies
+        ]
+
+    def batches():
+        return [
+            MatchBatch.from_tba(iter_json_array([body])) for body in bodies
+        ]
+
+    match_count = args.events * args.matches_per_event
+    results = {}
+    print(f"{'representation':<24}{'MB':>9}{'bytes/match':>13}{'ratio':>9}")
+    for name, build in (
+        ("models + rows", models_and_rows),
+        ("models", models),
+        ("rows", rows),
+        ("batch", batches),
+    ):
+        size, _ = retained_bytes(build)
+        results[name] = size
+        print(
+            f"{name:<24}{size / 1e6:>9.2f}{size / match_count:>13,.0f}"
+            f"{size / results['models + rows']:>9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
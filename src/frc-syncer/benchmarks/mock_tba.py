@@ -0,0 +1,232 @@
+"""A local stand-in for the TBA API, for load and concurrency testing.
+
+Run from `src/frc-syncer`:
+
+    python -m benchmarks.mock_tba --port 8700 --latency-ms 80 --max-rps 20
+
+and point the sync at it:
+
+    TBA_BASE_URL=http://127.0.0.1:8700/api/v3 python -m flows.download_historic
+
+Payloads come from `benchmarks.payloads`, or a `RESPONSE_CACHE_DIR` with
+`--fixtures`. Requests above `--max-rps` get a 429 with `Retry-After`.
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import NamedTuple
+
+from benchmarks import payloads
+from services import response_cache
+from settings import settings
+
+PATHS = (
+    re.compile(r"teams/(?P<year>\d{4})/(?P<page>\d+)"),
+    re.compile(r"events/(?P<year>\d{4})"),
+    re.compile(r"event/(?P<event_key>(?P<year>\d{4})\w+)/matches"),
+    re.compile(r"event/(?P<event_key>(?P<year>\d{4})\w+)/rankings"),
+)
+# The keys benchmarks.payloads.generate_events gives its events.
+GENERATED_EVENT_KEY = re.compile(r"\d{4}ev(?P<index>\d{3})")
+
+
+class Body(NamedTuple):
+    content: bytes
+    gzipped: bytes
+    etag: str
+
+
+def _body(content: bytes, etag: str | None = None) -> Body:
+    digest = hashlib.sha256(content).hexdigest()[:16]
+    return Body(content, gzip.compress(content, 5), etag or f'W/"{digest}"')
+
+
+class MockTBA:
+    """Builds response bodies and decides which requests get a 429."""
+
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.statuses: Counter = Counter()
+        self._rng = random.Random(args.seed)
+        self._lock = threading.Lock()
+        self._window = (0, 0)
+        self.body = lru_cache(maxsize=4096)(self._build)
+        if args.fixtures:
+            settings.RESPONSE_CACHE_DIR = args.fixtures
+
+    def _generate(self, path: str, match: re.Match) -> object | None:
+        args = self.args
+        year = int(match["year"])
+        event_key = match.groupdict().get("event_key")
+        if event_key:
+            generated = GENERATED_EVENT_KEY.fullmatch(event_key)
+            if not generated or int(generated["index"]) >= args.events:
+                return None
+        if path.startswith("teams/"):
+            pages = payloads.generate_team_pages(year, args.teams)
+            page = int(match["page"])
+            return pages[page] if page < len(pages) else []
+        if path.startswith("events/"):
+            return payloads.generate_events(year, args.events, args.seed)
+        if path.endswith("/matches"):
+            return payloads.generate_matches(
+                event_key,
+                args.matches_per_event,
+                breakdown_fields=args.breakdown_fields,
+                seed=args.seed + int(event_key[-3:]),
+            )
+        return payloads.generate_rankings(event_key)
+
+    def _build(self, path: str) -> Body | None:
+        match = next(
+            filter(None, (pattern.fullmatch(path) for pattern in PATHS)),
+            None,
+        )
+        if match is None:
+            return None
+
+        if self.args.fixtures:
+            response = response_cache.load(path, int(match["year"]))
+            if response.status_code != 200:
+                return None
+            return _body(response.content, response.headers.get("ETag"))
+
+        payload = self._generate(path, match)
+        if payload is None:
+            return None
+        return _body(json.dumps(payload).encode())
+
+    def rate_limited(self) -> bool:
+        with self._lock:
+            if self._rng.random() < self.args.rate_limit_ratio:
+                return True
+            if not self.args.max_rps:
+                return False
+            second, count = self._window
+            now = int(time.monotonic())
+            if now != second:
+                second, count = now, 0
+            self._window = (second, count + 1)
+            return count >= self.args.max_rps
+
+    def count(self, status: int):
+        with self._lock:
+            self.statuses[status] += 1
+
+    def latency(self) -> float:
+        with self._lock:
+            jitter = self._rng.uniform(-1, 1) * self.args.jitter_ms
+        return max(self.args.latency_ms + jitter, 0) / 1000
+
+
+def _matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+
+def make_handler(mock: MockTBA) -> type[BaseHTTPRequestHandler]:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            time.sleep(mock.latency())
+            path = self.path.split("?", 1)[0].removeprefix("/api/v3/")
+
+            if mock.rate_limited():
+                self._send(429, {"Retry-After": str(mock.args.retry_after)})
+                return
+
+            body = mock.body(path)
+            if body is None:
+                self._send(404, content=b'{"Errors": ["Not found"]}')
+                return
+
+            headers = {
+                "ETag": body.etag,
+                "Cache-Control": f"public, max-age={mock.args.max_age}",
+            }
+            if _matches(self.headers.get("If-None-Match"), body.etag):
+                self._send(304, headers)
+            elif "gzip" in self.headers.get("Accept-Encoding", ""):
+                headers["Content-Encoding"] = "gzip"
+                self._send(200, headers, body.gzipped)
+            else:
+                self._send(200, headers, body.content)
+
+        def _send(self, status: int, headers: dict | None = None, content=b""):
+            mock.count(status)
+            self.send_response(status)
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            if status != 304:
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            if content:
+                self.wfile.write(content)
+
+        def log_message(self, format, *args):
+            if mock.args.verbose:
+                super().log_message(format, *args)
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8700)
+    parser.add_argument("--teams", type=int, default=9999)
+    parser.add_argument("--events", type=int, default=60)
+    parser.add_argument("--matches-per-event", type=int, default=120)
+    parser.add_argument("--breakdown-fields", type=int, default=40)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--fixtures",
+        help="serve the latest bodies in this RESPONSE_CACHE_DIR instead",
+    )
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument(
+        "--max-rps",
+        type=int,
+        default=0,
+        help="answer 429 above this many requests per second (0: no limit)",
+    )
+    parser.add_argument(
+        "--rate-limit-ratio",
+        type=float,
+        default=0,
+        help="fraction of requests answered 429 at random",
+    )
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--max-age", type=int, default=0)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    mock = MockTBA(args)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(mock))
+    server.daemon_threads = True
+    print(f"Mock TBA: Serving http://{args.host}:{args.port}/api/v3")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"Mock TBA: Responses by status: {dict(mock.statuses)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+import random
+from datetime import date, datetime, timedelta
+
+EVENT_TYPES = [
+    "Regional",
+    "District",
+    "District Championship",
+    "Championship Division",
+    "Championship Finals",
+    "Offseason",
+    "Preseason",
+]
+
+PLAYOFF_TYPES = ["Elimination Bracket (8 Alliances)", "Double Elimination"]
+
+
+def generate_teams(year: int, count: int, seed: int = 0) -> list[dict]:
+    rng = random.Random(seed)
+    return [
+        {
+            "key": f"frc{number}",
+            "team_number": number,
+            "nickname": f"Team {number}",
+            "name": f"Sponsor {number} & High School {number}",
+            "city": f"City {rng.randint(1, 500)}",
+            "state_prov": f"State {rng.randint(1, 60)}",
+            "country": rng.choice(["USA", "Canada", "Israel", "Mexico"]),
+            "postal_code": f"{rng.randint(10000, 99999)}",
+            "website": None,
+            "rookie_year": rng.randint(1992, year),
+        }
+        for number in range(1, count + 1)
+    ]
+
+
+def generate_team_pages(
+    year: int, count: int, page_size: int = 500, seed: int = 0
+) -> list[list[dict]]:
+    """Splits teams into TBA-sized pages, ending with an empty page."""
+    teams = generate_teams(year, count, seed)
+    starts = range(0, count, page_size)
+    return [teams[start:][:page_size] for start in starts] + [[]]
+
+
+def generate_events(year: int, count: int, seed: int = 0) -> list[dict]:
+    rng = random.Random(seed)
+    events = []
+    for index in range(count):
+        key = f"{year}ev{index:03d}"
+        start = date(year, 3, 1) + timedelta(weeks=rng.randint(0, 7))
+        district = (
+            {
+                "abbreviation": f"d{index % 10}",
+                "display_name": f"District {index % 10}",
+                "key": f"{year}d{index % 10}",
+                "year": year,
+            }
+            if rng.random() < 0.5
+            else None
+        )
+        events.append(
+            {
+                "key": key,
+                "name": f"Event {index}",
+                "event_code": f"ev{index:03d}",
+                "event_type_string": rng.choice(EVENT_TYPES),
+                "district": district,
+                "city": f"City {rng.randint(1, 500)}",
+                "state_prov": f"State {rng.randint(1, 60)}",
+                "country": "USA",
+                "start_date": start.isoformat(),
+                "end_date": (start + timedelta(days=2)).isoformat(),
+                "year": year,
+                "short_name": f"Event {index}",
+                "week": (start - date(year, 3, 1)).days // 7,
+                "location_name": f"Arena {index}",
+                "timezone": "America/New_York",
+                "playoff_type_string": rng.choice(PLAYOFF_TYPES),
+                "division_keys": [],
+            }
+        )
+    return events
+
+
+def generate_score_breakdown(rng: random.Random, fields: int) -> dict:
+    return {
+        f"field{index}": rng.choice(
+            [
+                rng.randint(0, 60),
+                rng.random() < 0.5,
+                f"Level{rng.randint(1, 3)}",
+            ]
+        )
+        for index in range(fields)
+    }
+
+
+def generate_matches(
+    event_key: str,
+    count: int,
+    team_count: int = 40,
+    breakdown_fields: int = 40,
+    seed: int = 0,
+) -> list[dict]:
+    rng = random.Random(seed)
+    year = int(event_key[:4])
+    team_keys = [f"frc{rng.randint(1, 9999)}" for _ in range(team_count)]
+    start = int(datetime(year, 3, 1, 9).timestamp())
+
+    matches = []
+    for number in range(1, count + 1):
+        teams = rng.sample(team_keys, 6)
+        scores = {"red": rng.randint(0, 200), "blue": rng.randint(0, 200)}
+        scheduled = start + number * 420
+        matches.append(
+            {
+                "key": f"{event_key}_qm{number}",
+                "comp_level": "qm",
+                "set_number": 1,
+                "match_number": number,
+                "event_key": event_key,
+                "winning_alliance": (
+                    "red" if scores["red"] > scores["blue"] else "blue"
+                ),
+                "alliances": {
+                    color: {
+                        "score": scores[color],
+                        "team_keys": teams[offset:][:3],
+                        "surrogate_team_keys": [],
+                        "dq_team_keys": [],
+                    }
+                    for color, offset in (("red", 0), ("blue", 3))
+                },
+                "score_breakdown": (
+                    {
+                        color: generate_score_breakdown(rng, breakdown_fields)
+                        for color in ("red", "blue")
+                    }
+                    if breakdown_fields
+                    else None
+                ),
+                "videos": [],
+                "time": scheduled,
+                "actual_time": scheduled + rng.randint(-60, 600),
+                "predicted_time": scheduled,
+                "post_result_time": scheduled + 300,
+            }
+        )
+    return matches
+
+
+def generate_rankings(event_key: str, team_count: int = 40) -> dict:
+    return {
+        "rankings": [
+            {
+                "team_key": f"frc{rank}",
+                "rank": rank,
+                "matches_played": 12,
+                "dq": 0,
+                "record": {"wins": 6, "losses": 6, "ties": 0},
+            }
+            for rank in range(1, team_count + 1)
+        ],
+        "sort_order_info": [{"name": "Ranking Score", "precision": 2}],
+    }
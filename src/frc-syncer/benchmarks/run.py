@@ -0,0 +1,262 @@
+"""Throughput benchmarks for the sync pipeline, fully offline.
+
+Run from `src/frc-syncer`:
+
+    python -m benchmarks.run --events 60 --matches-per-event 120
+
+Pass `--postgres-dsn` to also time the COPY backend against a local
+Postgres that has the Supabase schema loaded.
+"""
+
+import argparse
+import json
+import time
+
+from benchmarks import payloads
+from benchmarks.fake_supabase import FakeSupabaseClient
+from models.filter_rules import FilterRules
+from models.tba.match import Match, MatchRows
+from models.tba.match_batch import MatchBatch
+from services import db_service
+from services.response_cache import CachedResponse
+from settings import settings
+from tasks.sync_event_matches import (
+    filter_matches,
+    process_event_matches_response,
+)
+from tasks.sync_event_ranks import process_event_rankings_response
+from tasks.sync_events import filter_events, process_event_response
+from tasks.sync_teams import process_team_page_response
+from utils.json_stream import iter_json_array
+
+
+def as_response(payload) -> CachedResponse:
+    return CachedResponse(200, json.dumps(payload).encode(), etag='W/"bench"')
+
+
+def best_of(repeat: int, fn) -> tuple[float, object]:
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+class Report:
+    def __init__(self, fake: FakeSupabaseClient, repeat: int):
+        self.fake = fake
+        self.repeat = repeat
+        self.rows: list[tuple] = []
+
+    def run(self, name: str, items: int, fn, writes: bool = False):
+        self.fake.reset_calls()
+        secs, result = best_of(self.repeat, fn)
+        db = self.fake.summary() if writes else None
+        if db:
+            db = {key: value // self.repeat for key, value in db.items()}
+        self.rows.append((name, items, secs, db))
+        return result
+
+    def print(self):
+        print(
+            f"{'benchmark':<32}{'items':>9}{'secs':>10}{'items/s':>12}"
+            f"{'db calls':>10}{'db MB':>9}"
+        )
+        for name, items, secs, db in self.rows:
+            calls = db["calls"] if db else ""
+            megabytes = f"{db['bytes'] / 1e6:.2f}" if db else ""
+            print(
+                f"{name:<32}{items:>9}{secs:>10.4f}{items / secs:>12,.0f}"
+                f"{calls:>10}{megabytes:>9}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--year", type=int, default=2024)
+    parser.add_argument("--teams", type=int, default=3500)
+    parser.add_argument("--events", type=int, default=60)
+    parser.add_argument("--matches-per-event", type=int, default=120)
+    parser.add_argument("--breakdown-fields", type=int, default=40)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--secs-per-mb", type=float, default=0.0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--postgres-dsn")
+    args = parser.parse_args()
+
+    fake = FakeSupabaseClient(
+        latency_secs=args.latency_ms / 1000,
+        secs_per_mb=args.secs_per_mb,
+        table_keys=db_service.TABLE_KEYS,
+    )
+    db_service.set_client(fake)
+    report = Report(fake, args.repeat)
+    rules = FilterRules.from_settings()
+
+    team_pages = payloads.generate_team_pages(args.year, args.teams)
+    team_responses = [as_response(page) for page in team_pages]
+    teams = report.run(
+        "teams: parse",
+        args.teams,
+        lambda: [
+            team
+            for page_num, response in enumerate(team_responses)
+            for team in process_team_page_response.fn(page_num, response)
+        ],
+    )
+    report.run(
+        "teams: upsert",
+        len(teams),
+        lambda: db_service.upsert_teams(teams),
+        writes=True,
+    )
+
+    event_response = as_response(
+        payloads.generate_events(args.year, args.events)
+    )
+    events = report.run(
+        "events: parse",
+        args.events,
+        lambda: process_event_response.fn(event_response),
+    )
+    events = report.run(
+        "events: filter",
+        len(events),
+        lambda: filter_events.fn(list(events), rules),
+    )
+    report.run(
+        "events: upsert",
+        len(events),
+        lambda: db_service.upsert_events(events),
+        writes=True,
+    )
+
+    event_keys = [f"{args.year}ev{index:03d}" for index in range(args.events)]
+    match_payloads = [
+        payloads.generate_matches(
+            event_key,
+            args.matches_per_event,
+            breakdown_fields=args.breakdown_fields,
+            seed=seed,
+        )
+        for seed, event_key in enumerate(event_keys)
+    ]
+    match_responses = [as_response(matches) for matches in match_payloads]
+    match_count = args.events * args.matches_per_event
+
+    report.run(
+        "matches: parse (models)",
+        match_count,
+        lambda: [
+            MatchRows(
+                [match.to_db() for match in models],
+                [a.to_db() for match in models for a in match.alliances],
+                [
+                    team.to_db()
+                    for match in models
+                    for alliance in match.alliances
+                    for team in alliance.teams
+                ],
+            )
+            for models in (
+                [Match.from_tba(match) for match in matches]
+                for matches in match_payloads
+            )
+        ],
+    )
+    event_rows = report.run(
+        "matches: parse (rows)",
+        match_count,
+        lambda: [
+            Match.rows_from_tba(list(iter_json_array(response.iter_body())))
+            for response in match_responses
+        ],
+    )
+
+    report.run(
+        "matches: parse (batch)",
+        match_count,
+        lambda: [
+            MatchBatch.from_tba(iter_json_array(response.iter_body()))
+            for response in match_responses
+        ],
+    )
+    event_rows = report.run(
+        "matches: filter",
+        match_count,
+        lambda: [filter_matches(rows, rules) for rows in event_rows],
+    )
+    report.run(
+        "matches: upsert",
+        match_count,
+        lambda: [
+            db_service.wait_for_upserts(
+                db_service.upsert_event_match_rows(rows)
+            )
+            for rows in event_rows
+        ],
+        writes=True,
+    )
+    report.run(
+        "matches: stream end to end",
+        match_count,
+        lambda: [
+            process_event_matches_response(event_key, response)
+            for event_key, response in zip(event_keys, match_responses)
+        ],
+        writes=True,
+    )
+
+    ranking_responses = {
+        event_key: as_response(payloads.generate_rankings(event_key))
+        for event_key in event_keys
+    }
+    rankings = report.run(
+        "rankings: parse",
+        40 * args.events,
+        lambda: [
+            process_event_rankings_response.fn(response, event_key)
+            for event_key, response in ranking_responses.items()
+        ],
+    )
+    report.run(
+        "rankings: upsert",
+        40 * args.events,
+        lambda: [db_service.upsert_event_rankings(r) for r in rankings],
+        writes=True,
+    )
+
+    if args.postgres_dsn:
+        settings.DB_BACKEND = "postgres"
+        settings.POSTGRES_DSN = args.postgres_dsn
+
+        def upsert_matches_per_event():
+            for rows in event_rows:
+                with db_service.event_transaction():
+                    db_service.upsert_event_match_rows(rows)
+
+        report.run(
+            "teams: upsert (copy)",
+            len(teams),
+            lambda: db_service.upsert_teams(teams),
+        )
+        report.run(
+            "events: upsert (copy)",
+            len(events),
+            lambda: db_service.upsert_events(events),
+        )
+        report.run(
+            "matches: upsert (copy)", match_count, upsert_matches_per_event
+        )
+        report.run(
+            "rankings: upsert (copy)",
+            40 * args.events,
+            lambda: [db_service.upsert_event_rankings(r) for r in rankings],
+        )
+
+    report.print()
+
+
+if __name__ == "__main__":
+    main()
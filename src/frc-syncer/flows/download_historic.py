@@ -1,9 +1,14 @@
 from datetime import datetime
 
+from models.filter_rules import reset_filter_rules
 from prefect import flow
-
-from tasks.sync_tba_year import sync_tba_data_for_year
+from services.checkpoint_journal import get_checkpoint_journal
+from services.etag_cache import reset_etag_caches
+from services.metrics import metrics, publish_run_metrics
 from settings import settings
+from tasks.sync_tba_year import sync_tba_data_for_year
+from utils.futures import iter_bounded
+from utils.steps import record_saved_overhead
 
 
 @flow(
@@ -14,9 +19,63 @@ from settings import settings
     retry_delay_seconds=15,
 )
 def download_historic():
-    for season in settings.HISTORIC_SEASONS:
-        sync_tba_data_for_year(season)
-        print(f"Synced data for {season} at {datetime.now()}")
+    metrics.reset()
+    reset_etag_caches()
+    reset_filter_rules()
+    failed_seasons = []
+
+    # With a journal, a restarted or retried run picks up where the last
+    # one stopped, down to the event.
+    journal = get_checkpoint_journal()
+    seasons = [
+        season
+        for season in settings.HISTORIC_SEASONS
+        if not (journal and journal.is_done(season, "season"))
+    ]
+    if len(seasons) < len(settings.HISTORIC_SEASONS):
+        print(
+            f"Resuming historic download: "
+            f"{len(settings.HISTORIC_SEASONS) - len(seasons)} seasons "
+            f"already synced."
+        )
+
+    for season, future in iter_bounded(
+        sync_tba_data_for_year,
+        seasons,
+        max_workers=settings.SEASON_SYNC_CONCURRENCY,
+        checkpoint=True,
+    ):
+        if future.state.is_completed():
+            summary = future.result()
+            if journal:
+                journal.mark_done(season, "season")
+            if summary.get("skipped"):
+                print(f"Skipped {season}: {summary['skipped']}")
+            else:
+                print(
+                    f"Synced data for {season} at {datetime.now()} "
+                    f"in {summary['duration_secs']:.1f}s"
+                )
+        else:
+            failed_seasons.append(season)
+            print(
+                f"Failed to sync data for {season} at {datetime.now()}: "
+                f"{future.state.message}"
+            )
+
+    synced_count = len(seasons) - len(failed_seasons)
+    print(
+        f"Historic download: {synced_count} seasons synced, "
+        f"{len(failed_seasons)} failed."
+    )
+    record_saved_overhead()
+    publish_run_metrics("download-historic")
+
+    if failed_seasons:
+        raise RuntimeError(f"Failed to sync seasons: {failed_seasons}")
+
+    if journal:
+        journal.clear()
 
 
 if __name__ == "__main__":
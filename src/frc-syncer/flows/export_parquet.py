@@ -0,0 +1,48 @@
+from datetime import datetime
+
+from prefect import flow
+from services.metrics import metrics, publish_run_metrics
+from services.parquet_sink import SEASON_COLUMNS, get_parquet_sink
+from settings import settings
+from tasks.export_parquet import export_table
+
+
+def season_tables() -> list[str]:
+    # The breakdowns table only exists when the sync splits them out.
+    return [
+        table
+        for table, column in SEASON_COLUMNS.items()
+        if column is not None
+        and (
+            table != "alliance-score-breakdowns"
+            or settings.SPLIT_SCORE_BREAKDOWNS
+        )
+    ]
+
+
+@flow(
+    name="Export Parquet",
+    description=(
+        "Exports synced seasons from the database to partitioned Parquet "
+        "files."
+    ),
+    version="1.0",
+)
+def export_parquet(seasons: list[int] | None = None):
+    if get_parquet_sink() is None:
+        raise ValueError("PARQUET_EXPORT_DIR must be set to export")
+
+    metrics.reset()
+    export_table("teams")
+
+    for season in seasons or settings.HISTORIC_SEASONS:
+        row_count = sum(
+            export_table(table, season) for table in season_tables()
+        )
+        print(f"Exported {row_count} rows for {season} at {datetime.now()}")
+
+    publish_run_metrics("export-parquet")
+
+
+if __name__ == "__main__":
+    export_parquet()
@@ -0,0 +1,50 @@
+from datetime import datetime
+
+from models.filter_rules import reset_filter_rules
+from prefect import flow
+from services.etag_cache import reset_etag_caches
+from services.metrics import metrics, publish_run_metrics
+from services.row_hash_store import get_row_hash_store
+from settings import settings
+from tasks.sync_tba_year import sync_tba_data_for_year
+from utils.steps import record_saved_overhead
+
+
+@flow(
+    name="Replay Cached TBA Data",
+    description=(
+        "Rebuilds the database from the local TBA response cache without "
+        "any network calls."
+    ),
+    version="1.0",
+)
+def replay_cache(seasons: list[int] | None = None):
+    if not settings.RESPONSE_CACHE_DIR:
+        raise ValueError("RESPONSE_CACHE_DIR must be set to replay")
+
+    metrics.reset()
+    reset_etag_caches()
+    reset_filter_rules()
+
+    # The target database may be empty, so every row must be written.
+    row_hash_store = get_row_hash_store()
+    if row_hash_store:
+        row_hash_store.reset()
+
+    # Settings are shared by the process, so later flows in it go back to
+    # the network.
+    offline_replay = settings.TBA_OFFLINE_REPLAY
+    settings.TBA_OFFLINE_REPLAY = True
+    try:
+        for season in seasons or settings.HISTORIC_SEASONS:
+            sync_tba_data_for_year(season, plan=False)
+            print(f"Replayed data for {season} at {datetime.now()}")
+    finally:
+        settings.TBA_OFFLINE_REPLAY = offline_replay
+
+    record_saved_overhead()
+    publish_run_metrics("replay-cache")
+
+
+if __name__ == "__main__":
+    replay_cache()
@@ -0,0 +1,82 @@
+from datetime import date, datetime, timedelta
+from time import monotonic, sleep
+
+from models.filter_rules import reset_filter_rules
+from prefect import flow
+from services.db_service import get_event_keys_between
+from services.etag_cache import get_etag_cache, reset_etag_caches
+from services.metrics import metrics, publish_run_metrics
+from settings import settings
+from tasks.export_parquet import flush_parquet_export
+from tasks.sync_event_matches import sync_event_matches
+from tasks.sync_event_ranks import sync_event_ranks
+from utils.futures import submit_bounded
+from utils.steps import record_saved_overhead
+
+
+def get_live_event_keys(today: date) -> list[str]:
+    # Event dates are local to the venue, so allow some slack either side.
+    slack = timedelta(days=settings.LIVE_EVENT_DATE_SLACK_DAYS)
+    return get_event_keys_between(today - slack, today + slack)
+
+
+@flow(
+    name="Sync Live Events",
+    description=(
+        "Polls matches and rankings of in-progress events, polling faster "
+        "while results are changing and backing off while they are not."
+    ),
+    version="1.0",
+)
+def sync_live_events(max_duration_hours: float = 16):
+    deadline = monotonic() + max_duration_hours * 3600
+    interval = settings.LIVE_POLL_MIN_SECS
+    metrics.reset()
+    reset_etag_caches()
+    reset_filter_rules()
+
+    while monotonic() < deadline:
+        today = date.today()
+        event_keys = get_live_event_keys(today)
+        if not event_keys:
+            print("Live Events: No events in progress.")
+            break
+
+        changed = [
+            *submit_bounded(
+                sync_event_matches,
+                event_keys,
+                max_workers=settings.EVENT_SYNC_CONCURRENCY,
+                year=today.year,
+            ).values(),
+            *submit_bounded(
+                sync_event_ranks,
+                event_keys,
+                max_workers=settings.EVENT_SYNC_CONCURRENCY,
+                year=today.year,
+            ).values(),
+        ]
+        get_etag_cache(today.year).flush()
+        flush_parquet_export()
+
+        if any(changed):
+            interval = settings.LIVE_POLL_MIN_SECS
+        else:
+            interval = min(
+                interval * settings.LIVE_POLL_BACKOFF,
+                settings.LIVE_POLL_MAX_SECS,
+            )
+
+        print(
+            f"Live Events: Polled {len(event_keys)} events at "
+            f"{datetime.now()}, {sum(changed)} updates. "
+            f"Next poll in {interval:.0f}s."
+        )
+        sleep(interval)
+
+    record_saved_overhead()
+    publish_run_metrics("sync-live-events")
+
+
+if __name__ == "__main__":
+    sync_live_events()
@@ -0,0 +1,85 @@
+from collections import Counter
+from threading import Lock
+
+from models.tba.event import Event
+from models.tba.match import MatchRows
+from pydantic import BaseModel
+from settings import settings
+
+
+class FilterRules(BaseModel):
+    """What a sync leaves out, compiled to sets."""
+
+    excluded_event_types: frozenset[str] = frozenset()
+    blacklisted_event_keys: frozenset[str] = frozenset()
+    blacklisted_team_keys: frozenset[str] = frozenset()
+    sync_event_divisions: bool = False
+
+    @classmethod
+    def from_settings(cls) -> "FilterRules":
+        return cls(
+            excluded_event_types=frozenset(settings.EXCLUDED_EVENT_TYPES),
+            blacklisted_event_keys=frozenset(settings.BLACKLISTED_EVENT_KEYS),
+            blacklisted_team_keys=frozenset(settings.BLACKLISTED_TEAM_KEYS),
+            sync_event_divisions=settings.SYNC_EVENT_DIVISIONS,
+        )
+
+    def filter_events(
+        self, events: list[Event]
+    ) -> tuple[list[Event], Counter]:
+        """Drops excluded and blacklisted events and unsynced divisions."""
+        kept = []
+        dropped = Counter()
+        for event in events:
+            if event.event_type in self.excluded_event_types:
+                dropped["event_type"] += 1
+                continue
+            if event.key in self.blacklisted_event_keys:
+                dropped["blacklisted_event"] += 1
+                continue
+
+            divisions = [
+                division
+                for division in event.divisions
+                if self.sync_event_divisions
+                and division.division_event_key
+                not in self.blacklisted_event_keys
+            ]
+            if len(divisions) != len(event.divisions):
+                dropped["division"] += len(event.divisions) - len(divisions)
+                event.divisions = divisions
+            kept.append(event)
+        return kept, dropped
+
+    def filter_matches(self, rows: MatchRows) -> tuple[MatchRows, Counter]:
+        """Drops blacklisted teams from the alliances of match rows."""
+        if not self.blacklisted_team_keys:
+            return rows, Counter()
+
+        alliance_teams = [
+            team
+            for team in rows.alliance_teams
+            if team["team_key"] not in self.blacklisted_team_keys
+        ]
+        return rows._replace(alliance_teams=alliance_teams), Counter(
+            blacklisted_team=len(rows.alliance_teams) - len(alliance_teams)
+        )
+
+
+_rules: FilterRules | None = None
+_rules_lock = Lock()
+
+
+def reset_filter_rules():
+    """Drops the compiled rules, so the next run compiles them again."""
+    global _rules
+    with _rules_lock:
+        _rules = None
+
+
+def get_filter_rules() -> FilterRules:
+    global _rules
+    with _rules_lock:
+        if _rules is None:
+            _rules = FilterRules.from_settings()
+        return _rules
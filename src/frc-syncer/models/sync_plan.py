@@ -0,0 +1,32 @@
+from collections import Counter
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class SeasonPlan(BaseModel):
+    year: int
+    skip_reason: Optional[str] = None
+    skipped_endpoints: dict[str, str] = {}
+
+    def should_sync(self, endpoint: str) -> bool:
+        return self.skip_reason is None and (
+            endpoint not in self.skipped_endpoints
+        )
+
+    def summary(self) -> str:
+        if self.skip_reason:
+            return f"Plan {self.year}: Skipping season ({self.skip_reason})."
+        if not self.skipped_endpoints:
+            return f"Plan {self.year}: Syncing everything."
+
+        reasons = ", ".join(
+            f"{count} {reason}"
+            for reason, count in Counter(
+                self.skipped_endpoints.values()
+            ).most_common()
+        )
+        return (
+            f"Plan {self.year}: Skipping {len(self.skipped_endpoints)} "
+            f"event endpoints ({reasons})."
+        )
@@ -1,10 +1,19 @@
 from datetime import datetime
-from json import dumps
-from typing import Optional
+from typing import Iterable, NamedTuple, Optional
 
 from pydantic import BaseModel
 
 
+def isoformat_timestamp(timestamp: Optional[int]) -> Optional[str]:
+    return datetime.fromtimestamp(timestamp).isoformat() if timestamp else None
+
+
+class MatchRows(NamedTuple):
+    matches: list[dict]
+    alliances: list[dict]
+    alliance_teams: list[dict]
+
+
 class AllianceTeam(BaseModel):
     key: str
     team_key: str
@@ -29,7 +38,7 @@ class Alliance(BaseModel):
     match_key: str
     color: str
     score: int
-    score_breakdown: Optional[str] = None
+    score_breakdown: Optional[dict] = None
     teams: list[AllianceTeam]
 
     @classmethod
@@ -38,7 +47,7 @@ class Alliance(BaseModel):
         match_key: str,
         color: str,
         alliance_data: dict,
-        score_breakdown: Optional[str] = None,
+        score_breakdown: Optional[dict] = None,
     ) -> "Alliance":
         return cls(
             key=f"{match_key}_{color}",
@@ -87,7 +96,7 @@ class Match(BaseModel):
                     color,
                     match["alliances"][color],
                     score_breakdown=(
-                        dumps(match["score_breakdown"].get(color, {}))
+                        match["score_breakdown"].get(color, {})
                         if match["score_breakdown"]
                         else None
                     ),
@@ -95,27 +104,72 @@ class Match(BaseModel):
                 for color in ("red", "blue")
             ],
             event_key=match["event_key"],
-            time=(
-                datetime.fromtimestamp(match["time"]).isoformat()
-                if match["time"]
-                else None
-            ),
-            actual_time=(
-                datetime.fromtimestamp(match["actual_time"]).isoformat()
-                if match["actual_time"]
-                else None
-            ),
-            predicted_time=(
-                datetime.fromtimestamp(match["predicted_time"]).isoformat()
-                if match["predicted_time"]
-                else None
-            ),
-            post_result_time=(
-                datetime.fromtimestamp(match["post_result_time"]).isoformat()
-                if match["post_result_time"]
-                else None
-            ),
+            time=isoformat_timestamp(match["time"]),
+            actual_time=isoformat_timestamp(match["actual_time"]),
+            predicted_time=isoformat_timestamp(match["predicted_time"]),
+            post_result_time=isoformat_timestamp(match["post_result_time"]),
         )
 
     def to_db(self):
         return self.model_dump(exclude={"alliances"})
+
+    @classmethod
+    def rows_from_tba(cls, matches: Iterable[dict]) -> MatchRows:
+        """Builds DB rows straight from a TBA match list.
+
+        Produces the same rows as `from_tba` followed by `to_db` on the match,
+        its alliances and their teams, without building or validating the
+        models in between.
+        """
+        rows = MatchRows([], [], [])
+        for match in matches:
+            match_key = match["key"]
+            rows.matches.append(
+                {
+                    "key": match_key,
+                    "comp_level": match["comp_level"],
+                    "set_number": match["set_number"],
+                    "match_number": match["match_number"],
+                    "winning_alliance": match["winning_alliance"],
+                    "event_key": match["event_key"],
+                    "time": isoformat_timestamp(match["time"]),
+                    "actual_time": isoformat_timestamp(match["actual_time"]),
+                    "predicted_time": isoformat_timestamp(
+                        match["predicted_time"]
+                    ),
+                    "post_result_time": isoformat_timestamp(
+                        match["post_result_time"]
+                    ),
+                }
+            )
+
+            score_breakdown = match["score_breakdown"]
+            for color in ("red", "blue"):
+                alliance_data = match["alliances"][color]
+                alliance_key = f"{match_key}_{color}"
+                rows.alliances.append(
+                    {
+                        "key": alliance_key,
+                        "match_key": match_key,
+                        "color": color,
+                        "score": alliance_data.get("score", 0),
+                        "score_breakdown": (
+                            score_breakdown.get(color, {})
+                            if score_breakdown
+                            else None
+                        ),
+                    }
+                )
+                rows.alliance_teams.extend(
+                    {
+                        "key": f"{match_key}_{team_key}",
+                        "team_key": team_key,
+                        "alliance_key": alliance_key,
+                    }
+                    for team_key in (
+                        alliance_data.get("team_keys", [])
+                        + alliance_data.get("surrogate_team_keys", [])
+                        + alliance_data.get("dq_team_keys", [])
+                    )
+                )
+        return rows
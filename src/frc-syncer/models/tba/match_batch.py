@@ -0,0 +1,145 @@
+import sys
+from array import array
+from typing import Iterable
+
+from models.tba.match import isoformat_timestamp
+
+COLORS = ("red", "blue")
+TIME_COLUMNS = ("time", "actual_time", "predicted_time", "post_result_time")
+
+# Longer strings in score breakdowns are rare and seldom repeat.
+_INTERN_MAX_LENGTH = 32
+
+
+def _intern(value):
+    if isinstance(value, str) and len(value) <= _INTERN_MAX_LENGTH:
+        return sys.intern(value)
+    return value
+
+
+def _compact(value):
+    # Breakdowns of a season share their keys and most of their values.
+    if isinstance(value, dict):
+        return {sys.intern(key): _compact(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_compact(item) for item in value]
+    return _intern(value)
+
+
+class MatchBatch:
+    """An event's match rows stored as columns, built into dicts on read.
+
+    Building a batch and then its rows costs about three times as much CPU
+    as `Match.rows_from_tba`, so it only pays off where many events' matches
+    are held in memory at once. The streaming sync uses rows.
+    """
+
+    __slots__ = (
+        "keys",
+        "comp_levels",
+        "set_numbers",
+        "match_numbers",
+        "winning_alliances",
+        "event_keys",
+        "times",
+        "scores",
+        "score_breakdowns",
+        "team_keys",
+        "team_alliances",
+    )
+
+    def __init__(self):
+        self.keys: list[str] = []
+        self.comp_levels: list[str] = []
+        self.set_numbers = array("l")
+        self.match_numbers = array("l")
+        self.winning_alliances: list[str | None] = []
+        self.event_keys: list[str] = []
+        # Epoch seconds, with 0 where TBA has no time.
+        self.times = {column: array("q") for column in TIME_COLUMNS}
+        self.scores: list[int] = []
+        self.score_breakdowns: list[dict | None] = []
+        self.team_keys: list[str] = []
+        self.team_alliances = array("L")
+
+    @classmethod
+    def from_tba(cls, matches: Iterable[dict]) -> "MatchBatch":
+        batch = cls()
+        for match in matches:
+            batch.keys.append(sys.intern(match["key"]))
+            batch.comp_levels.append(sys.intern(match["comp_level"]))
+            batch.set_numbers.append(match["set_number"])
+            batch.match_numbers.append(match["match_number"])
+            batch.winning_alliances.append(_intern(match["winning_alliance"]))
+            batch.event_keys.append(sys.intern(match["event_key"]))
+            for column, times in batch.times.items():
+                times.append(match[column] or 0)
+
+            score_breakdown = match["score_breakdown"]
+            for color in COLORS:
+                alliance_data = match["alliances"][color]
+                alliance_index = len(batch.scores)
+                batch.scores.append(alliance_data.get("score", 0))
+                batch.score_breakdowns.append(
+                    _compact(score_breakdown.get(color, {}))
+                    if score_breakdown
+                    else None
+                )
+                for team_key in (
+                    alliance_data.get("team_keys", [])
+                    + alliance_data.get("surrogate_team_keys", [])
+                    + alliance_data.get("dq_team_keys", [])
+                ):
+                    batch.team_keys.append(sys.intern(team_key))
+                    batch.team_alliances.append(alliance_index)
+        return batch
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @property
+    def matches(self) -> list[dict]:
+        return [
+            {
+                "key": key,
+                "comp_level": self.comp_levels[index],
+                "set_number": self.set_numbers[index],
+                "match_number": self.match_numbers[index],
+                "winning_alliance": self.winning_alliances[index],
+                "event_key": self.event_keys[index],
+                **{
+                    column: isoformat_timestamp(times[index])
+                    for column, times in self.times.items()
+                },
+            }
+            for index, key in enumerate(self.keys)
+        ]
+
+    @property
+    def alliances(self) -> list[dict]:
+        return [
+            {
+                "key": f"{self.keys[index // 2]}_{COLORS[index % 2]}",
+                "match_key": self.keys[index // 2],
+                "color": COLORS[index % 2],
+                "score": score,
+                "score_breakdown": self.score_breakdowns[index],
+            }
+            for index, score in enumerate(self.scores)
+        ]
+
+    @property
+    def alliance_teams(self) -> list[dict]:
+        return [
+            {
+                "key": f"{self.keys[alliance_index // 2]}_{team_key}",
+                "team_key": team_key,
+                "alliance_key": (
+                    f"{self.keys[alliance_index // 2]}_"
+                    f"{COLORS[alliance_index % 2]}"
+                ),
+            }
+            for team_key, alliance_index in zip(
+                self.team_keys, self.team_alliances
+            )
+        ]
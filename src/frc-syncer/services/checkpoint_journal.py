@@ -0,0 +1,76 @@
+import sqlite3
+from threading import Lock
+
+from settings import settings
+
+# The unit recorded for data types synced as a whole, like teams.
+SEASON_UNIT = ""
+
+
+class CheckpointJournal:
+    """SQLite record of the units a sync has finished, for resuming it."""
+
+    def __init__(self, path: str):
+        self._lock = Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS checkpoints ("
+                "year INTEGER NOT NULL, "
+                "data_type TEXT NOT NULL, "
+                "unit TEXT NOT NULL, "
+                "completed_on TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP, "
+                "PRIMARY KEY (year, data_type, unit)"
+                ") WITHOUT ROWID"
+            )
+
+    def is_done(
+        self, year: int, data_type: str, unit: str = SEASON_UNIT
+    ) -> bool:
+        with self._lock:
+            return (
+                self._connection.execute(
+                    "SELECT 1 FROM checkpoints "
+                    "WHERE year = ? AND data_type = ? AND unit = ?",
+                    (year, data_type, unit),
+                ).fetchone()
+                is not None
+            )
+
+    def done_units(self, year: int, data_type: str) -> set[str]:
+        with self._lock:
+            return {
+                unit
+                for (unit,) in self._connection.execute(
+                    "SELECT unit FROM checkpoints "
+                    "WHERE year = ? AND data_type = ?",
+                    (year, data_type),
+                )
+            }
+
+    def mark_done(self, year: int, data_type: str, unit: str = SEASON_UNIT):
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO checkpoints (year, data_type, unit) "
+                "VALUES (?, ?, ?)",
+                (year, data_type, unit),
+            )
+
+    def clear(self):
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM checkpoints")
+
+
+_journal: CheckpointJournal | None = None
+_journal_lock = Lock()
+
+
+def get_checkpoint_journal() -> CheckpointJournal | None:
+    """Returns the shared journal, or None when CHECKPOINT_PATH is unset."""
+    global _journal
+    if not settings.CHECKPOINT_PATH:
+        return None
+    with _journal_lock:
+        if _journal is None:
+            _journal = CheckpointJournal(settings.CHECKPOINT_PATH)
+        return _journal
@@ -1,37 +1,180 @@
 import os
-from datetime import datetime
-
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from datetime import date, datetime
+from itertools import batched
+from threading import Lock
+from typing import TYPE_CHECKING
+
+import orjson
 from dotenv import load_dotenv
 from models.tba.event import Event
-from models.tba.match import Match
+from models.tba.match import Match, MatchRows
+from models.tba.match_batch import MatchBatch
 from models.tba.ranking import Ranking
 from models.tba.tba_page_etag import TBAPageEtag
 from models.tba.team import Team
-from supabase import Client, create_client
+from services import postgres_service
+from services.metrics import metrics
+from services.parquet_sink import SEASON_COLUMNS, get_parquet_sink
+from services.row_hash_store import get_row_hash_store
+from settings import settings
+
+if TYPE_CHECKING:
+    from supabase import Client
+
+_client: "Client | None" = None
+_client_lock = Lock()
+
+
+def get_client() -> "Client":
+    """Returns the Supabase client, creating it on first use."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            # Imported here since the client library is slow to import.
+            from supabase import create_client
+
+            load_dotenv()
+            url = os.getenv("SUPABASE_URL")
+            key = os.getenv("SUPABASE_KEY")
+            if not url or not key:
+                raise ValueError("SUPABASE_URL and SUPABASE_KEY must be set")
+            _client = create_client(url, key)
+        return _client
+
+
+def set_client(client: "Client | None"):
+    """Replaces the Supabase client, or resets it with None."""
+    global _client
+    with _client_lock:
+        _client = client
+
+
+TABLE_KEYS: dict[str, tuple[str, ...]] = {
+    "teams": ("key",),
+    "districts": ("key",),
+    "events": ("key",),
+    "event-divisions": ("parent_event_key", "division_event_key"),
+    "matches": ("key",),
+    "alliances": ("key",),
+    "alliance-score-breakdowns": ("alliance_key",),
+    "alliance-teams": ("key",),
+    "rankings": ("event_key", "team_key"),
+}
+
+_upsert_executor = ThreadPoolExecutor(
+    max_workers=settings.DB_UPSERT_CONCURRENCY,
+    thread_name_prefix="db-upsert",
+)
+
+# Runs whole deferred table writes, which fan out to _upsert_executor,
+# so that concurrent events do not queue behind each other's writes.
+_deferred_executor = ThreadPoolExecutor(
+    max_workers=max(settings.DB_DEFERRED_UPSERT_CONCURRENCY, 1),
+    thread_name_prefix="db-deferred",
+)
+
+
+# Rows of one table are close in size, so a few of them size the batches
+# rather than serializing every row once more than the request does.
+_BATCH_SIZE_SAMPLE = 16
+
+
+def _batch_rows(rows: list[dict]) -> list[list[dict]]:
+    row_bytes = max(
+        (len(orjson.dumps(row)) for row in rows[:_BATCH_SIZE_SAMPLE]),
+        default=1,
+    )
+    batch_size = max(
+        min(
+            settings.DB_UPSERT_BATCH_ROWS,
+            settings.DB_UPSERT_BATCH_BYTES // row_bytes,
+        ),
+        1,
+    )
+    return [list(batch) for batch in batched(rows, batch_size)]
+
+
+def _upsert_batch(table: str, rows: list[dict]):
+    get_client().table(table).upsert(rows).execute()
+
+
+def _upsert_rows(table: str, rows: list[dict]):
+    """Upserts rows in size-bounded batches, skipping unchanged rows."""
+    row_hash_store = get_row_hash_store()
+    if row_hash_store:
+        rows, pending_hashes = row_hash_store.filter_changed(
+            table, rows, TABLE_KEYS[table]
+        )
+        if not rows:
+            return
+
+    with metrics.timer("upsert", table):
+        if settings.DB_BACKEND == "postgres":
+            postgres_service.copy_upsert(table, rows, TABLE_KEYS[table])
+        elif len(batches := _batch_rows(rows)) == 1:
+            _upsert_batch(table, batches[0])
+        else:
+            futures = [
+                _upsert_executor.submit(_upsert_batch, table, batch)
+                for batch in batches
+            ]
+            for future in futures:
+                future.result()
+    metrics.add_rows(table, len(rows))
+
+    # A rolled back event transaction must neither mark its rows as
+    # written nor export them.
+    if row_hash_store:
+        postgres_service.after_commit(
+            lambda: row_hash_store.record(table, pending_hashes)
+        )
+
+    parquet_sink = get_parquet_sink()
+    if parquet_sink:
+        postgres_service.after_commit(
+            lambda: parquet_sink.add(table, rows, TABLE_KEYS[table])
+        )
+
+
+@contextmanager
+def event_transaction():
+    """Groups an event's writes into one transaction on postgres."""
+    if settings.DB_BACKEND == "postgres":
+        with postgres_service.transaction():
+            yield
+    else:
+        yield
 
-load_dotenv()
 
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+def _defer_upsert_rows(table: str, rows: list[dict]) -> list[Future]:
+    # Deferred writes run on another connection, outside of the event
+    # transaction, and COPY is fast enough to write them in line.
+    if settings.DB_BACKEND == "postgres":
+        _upsert_rows(table, rows)
+        return []
+    return [_deferred_executor.submit(_upsert_rows, table, rows)]
 
-if not SUPABASE_URL or not SUPABASE_KEY:
-    raise ValueError("SUPABASE_URL and SUPABASE_KEY must be set")
 
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+def wait_for_upserts(futures: list[Future]):
+    """Waits for the given deferred writes, then raises the first failure."""
+    wait(futures)
+    for future in futures:
+        future.result()
 
 
 def upsert_teams(teams: list[Team]):
 
     new_teams = [team.to_db() for team in teams]
     if new_teams:
-        supabase.table("teams").upsert(
-            new_teams,
-        ).execute()
+        _upsert_rows("teams", new_teams)
 
 
 def get_event_keys_for_year(year: int) -> list[str]:
     response = (
-        supabase.table("events")
+        get_client()
+        .table("events")
         .select("key")
         .eq("year", year)
         .order("key")
@@ -40,6 +183,38 @@ def get_event_keys_for_year(year: int) -> list[str]:
     return [event["key"] for event in response.data]
 
 
+def get_event_dates_for_year(year: int) -> dict[str, tuple[date, date]]:
+    response = (
+        get_client()
+        .table("events")
+        .select("key", "start_date", "end_date")
+        .eq("year", year)
+        .order("key")
+        .execute()
+    )
+    return {
+        event["key"]: (
+            date.fromisoformat(event["start_date"]),
+            date.fromisoformat(event["end_date"]),
+        )
+        for event in response.data
+    }
+
+
+def get_event_keys_between(start: date, end: date) -> list[str]:
+    """Returns the keys of events that run on any day from start to end."""
+    response = (
+        get_client()
+        .table("events")
+        .select("key")
+        .lte("start_date", end.isoformat())
+        .gte("end_date", start.isoformat())
+        .order("key")
+        .execute()
+    )
+    return [event["key"] for event in response.data]
+
+
 def upsert_events(events: list[Event]):
     new_districts = [
         district.to_db()
@@ -51,15 +226,11 @@ def upsert_events(events: list[Event]):
         }.values()
     ]
     if new_districts:
-        supabase.table("districts").upsert(
-            new_districts,
-        ).execute()
+        _upsert_rows("districts", new_districts)
 
     new_events = [event.to_db() for event in events]
     if new_events:
-        supabase.table("events").upsert(
-            new_events,
-        ).execute()
+        _upsert_rows("events", new_events)
     else:
         return
 
@@ -67,94 +238,158 @@ def upsert_events(events: list[Event]):
         division.to_db() for event in events for division in event.divisions
     ]
     if new_event_divisions:
-        supabase.table("event-divisions").upsert(new_event_divisions).execute()
+        _upsert_rows("event-divisions", new_event_divisions)
 
 
 def upsert_event_matches(matches: list[Match]):
+    deferred = upsert_event_match_rows(
+        MatchRows(
+            matches=[match.to_db() for match in matches],
+            alliances=[
+                alliance.to_db()
+                for match in matches
+                for alliance in match.alliances
+            ],
+            alliance_teams=[
+                team.to_db()
+                for match in matches
+                for alliance in match.alliances
+                for team in alliance.teams
+            ],
+        )
+    )
+    wait_for_upserts(deferred)
 
-    new_matches = [match.to_db() for match in matches]
-    if new_matches:
-        supabase.table("matches").upsert(
-            new_matches,
-        ).execute()
-    else:
-        return
 
-    new_alliances = [
-        alliance.to_db() for match in matches for alliance in match.alliances
-    ]
-    if new_alliances:
-        supabase.table("alliances").upsert(
-            new_alliances,
-        ).execute()
+def upsert_event_match_rows(rows: MatchRows | MatchBatch) -> list[Future]:
+    """Upserts match rows and returns the deferred breakdown writes."""
+    # A MatchBatch builds each table's rows on access, so every table is
+    # read once and its rows are dropped once written.
+    matches = rows.matches
+    if matches:
+        _upsert_rows("matches", matches)
     else:
-        return
+        return []
+    del matches
+
+    alliances = rows.alliances
+    score_breakdowns = []
+    if settings.SPLIT_SCORE_BREAKDOWNS:
+        score_breakdowns = [
+            {
+                "alliance_key": alliance["key"],
+                "score_breakdown": alliance["score_breakdown"],
+            }
+            for alliance in alliances
+            if alliance["score_breakdown"] is not None
+        ]
+        alliances = [
+            {
+                column: value
+                for column, value in alliance.items()
+                if column != "score_breakdown"
+            }
+            for alliance in alliances
+        ]
+
+    if alliances:
+        _upsert_rows("alliances", alliances)
+    else:
+        return []
 
-    new_alliance_teams = [
-        team.to_db()
-        for match in matches
-        for alliance in match.alliances
-        for team in alliance.teams
-    ]
-    if new_alliance_teams:
-        supabase.table("alliance-teams").upsert(
-            new_alliance_teams,
-        ).execute()
+    # Breakdowns make up most of the payload, so they are written in the
+    # background instead of holding up the rest of the sync.
+    deferred = []
+    if score_breakdowns:
+        deferred = _defer_upsert_rows(
+            "alliance-score-breakdowns", score_breakdowns
+        )
+
+    del alliances
+    alliance_teams = rows.alliance_teams
+    if alliance_teams:
+        _upsert_rows("alliance-teams", alliance_teams)
+    return deferred
 
 
 def upsert_event_rankings(rankings: list[Ranking]):
     new_rankings = [ranking.to_db() for ranking in rankings]
     if new_rankings:
-        supabase.table("rankings").upsert(
-            new_rankings,
-        ).execute()
-
-
-def upsert_tba_page_etag(etag: TBAPageEtag) -> None:
-    etag_data = etag.model_dump()
-
-    if etag.id:
-        etag_data["id"] = etag.id
-    else:
-        etag_data.pop("id")
-
-    supabase.table("tba-pages-etags").upsert(
-        [etag_data],
-    ).execute()
-
-
-def get_tba_page_etag(
-    page_num: int | None, endpoint: str, year: int
-) -> TBAPageEtag | None:
-
+        _upsert_rows("rankings", new_rankings)
+
+
+def upsert_tba_page_etags(etags: list[TBAPageEtag]) -> list[TBAPageEtag]:
+    # Rows with and without an id have different columns, so PostgREST
+    # needs them in separate requests.
+    saved = []
+    for etag_data in (
+        [etag.model_dump() for etag in etags if etag.id],
+        [etag.model_dump(exclude={"id"}) for etag in etags if not etag.id],
+    ):
+        if etag_data:
+            response = (
+                get_client()
+                .table("tba-pages-etags")
+                .upsert(etag_data)
+                .execute()
+            )
+            saved.extend(TBAPageEtag(**row) for row in response.data)
+    return saved
+
+
+def get_tba_page_etags_for_year(year: int) -> list[TBAPageEtag]:
+    etags = []
+    page_size = 1000
+    while True:
+        response = (
+            get_client()
+            .table("tba-pages-etags")
+            .select("id", "etag", "endpoint", "page_num", "year")
+            .eq("year", year)
+            .order("id")
+            .range(len(etags), len(etags) + page_size - 1)
+            .execute()
+        )
+        etags.extend(TBAPageEtag(**row) for row in response.data)
+        if len(response.data) < page_size:
+            return etags
+
+
+def get_table_rows(table: str, year: int | None = None) -> list[dict]:
+    """Pages through the rows of a table, or only those of one season."""
+    rows = []
+    page_size = 1000
+    while True:
+        query = get_client().table(table).select("*")
+        if year is not None and SEASON_COLUMNS[table] == "year":
+            query = query.eq("year", year)
+        elif year is not None:
+            query = query.like(SEASON_COLUMNS[table], f"{year}%")
+        for column in TABLE_KEYS[table]:
+            query = query.order(column)
+        response = query.range(len(rows), len(rows) + page_size - 1).execute()
+        rows.extend(response.data)
+        if len(response.data) < page_size:
+            return rows
+
+
+def get_last_sync_time(year: int) -> datetime | None:
     response = (
-        supabase.table("tba-pages-etags")
-        .select("id", "etag", "endpoint", "page_num", "year")
-        .eq("endpoint", endpoint)
+        get_client()
+        .table("tba-sync")
+        .select("synced_on")
         .eq("year", year)
+        .order("synced_on", desc=True)
         .limit(1)
+        .execute()
     )
-
-    if page_num is not None:
-        response = response.eq("page_num", page_num)
-
-    response = response.execute()
-
     if len(response.data) == 0:
         return None
-
-    etag_data = response.data[0]
-    return TBAPageEtag(
-        id=etag_data["id"],
-        page_num=etag_data["page_num"],
-        etag=etag_data["etag"],
-        endpoint=etag_data["endpoint"],
-        year=etag_data["year"],
-    )
+    return datetime.fromisoformat(response.data[0]["synced_on"])
 
 
 def insert_sync_timestamp(year: int) -> None:
 
-    supabase.table("tba-sync").insert(
+    get_client().table("tba-sync").insert(
         [{"year": year, "synced_on": datetime.now().isoformat()}]
     ).execute()
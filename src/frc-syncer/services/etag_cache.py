@@ -0,0 +1,111 @@
+from threading import Lock
+
+from models.tba.tba_page_etag import TBAPageEtag
+from services.db_service import (
+    get_tba_page_etags_for_year,
+    upsert_tba_page_etags,
+)
+from services.metrics import metrics
+from settings import settings
+
+
+class EtagCache:
+    """In-memory view of a year's `tba-pages-etags`, saved by `flush`."""
+
+    def __init__(self, year: int):
+        self.year = year
+        self._lock = Lock()
+        with metrics.timer("etag", "load"):
+            etags = get_tba_page_etags_for_year(year)
+        self._etags: dict[tuple[str, int | None], TBAPageEtag] = {
+            (etag.endpoint, etag.page_num): etag for etag in etags
+        }
+        self._dirty: set[tuple[str, int | None]] = set()
+        self._in_flight: set[tuple[str, int | None]] = set()
+
+    def get(self, endpoint: str, page_num: int | None = None) -> str | None:
+        with self._lock:
+            etag = self._etags.get((endpoint, page_num))
+        return etag.etag if etag else None
+
+    def page_nums(self, endpoint: str) -> list[int]:
+        with self._lock:
+            return [
+                page_num
+                for stored_endpoint, page_num in self._etags
+                if stored_endpoint == endpoint and page_num is not None
+            ]
+
+    def set(
+        self, endpoint: str, etag: str | None, page_num: int | None = None
+    ):
+        if not etag:
+            return
+
+        key = (endpoint, page_num)
+        with self._lock:
+            existing = self._etags.get(key)
+            if existing and existing.etag == etag:
+                return
+            self._etags[key] = TBAPageEtag(
+                id=existing.id if existing else None,
+                page_num=page_num,
+                etag=etag,
+                endpoint=endpoint,
+                year=self.year,
+            )
+            self._dirty.add(key)
+            should_flush = len(self._dirty) >= settings.ETAG_FLUSH_INTERVAL
+
+        if should_flush:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            # Keys still being written by another flush stay dirty for the
+            # next one.
+            keys = self._dirty - self._in_flight
+            pending = [self._etags[key] for key in keys]
+            self._dirty -= keys
+            self._in_flight |= keys
+
+        if not pending:
+            return
+
+        try:
+            with metrics.timer("etag", "flush"):
+                saved = upsert_tba_page_etags(pending)
+            with self._lock:
+                # Later writes of a new row update it instead of adding
+                # another, even if its ETag changed during this one.
+                for etag in saved:
+                    key = (etag.endpoint, etag.page_num)
+                    current = self._etags.get(key)
+                    if current and current.id is None:
+                        self._etags[key] = current.model_copy(
+                            update={"id": etag.id}
+                        )
+        except Exception:
+            with self._lock:
+                self._dirty |= keys
+            raise
+        finally:
+            with self._lock:
+                self._in_flight -= keys
+
+
+_caches: dict[int, EtagCache] = {}
+_caches_lock = Lock()
+
+
+def reset_etag_caches():
+    """Drops the loaded caches, so the next run reloads them."""
+    with _caches_lock:
+        _caches.clear()
+
+
+def get_etag_cache(year: int) -> EtagCache:
+    with _caches_lock:
+        if year not in _caches:
+            _caches[year] = EtagCache(year)
+        return _caches[year]
@@ -0,0 +1,246 @@
+import json
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from threading import Lock
+
+from prefect.artifacts import create_markdown_artifact
+from settings import settings
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+class Histogram:
+    def __init__(self):
+        self.bucket_counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.bucket_counts[bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th observation."""
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS, self.bucket_counts):
+            seen += count
+            if seen >= target:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "sum_secs": round(self.sum, 6),
+            "mean_secs": round(self.sum / self.count, 6) if self.count else 0,
+            "p50_secs": self.quantile(0.5),
+            "p95_secs": self.quantile(0.95),
+            "max_secs": round(self.max, 6),
+        }
+
+
+class Metrics:
+    """Thread-safe collector for the stages of a sync run."""
+
+    def __init__(self):
+        self._lock = Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started = datetime.now()
+            self.latencies: dict[tuple[str, str], Histogram] = {}
+            self.bytes_fetched: dict[str, int] = {}
+            self.responses: dict[tuple[str, int], int] = {}
+            self.rows_written: dict[str, int] = {}
+            self.dropped: dict[tuple[str, str], int] = {}
+            self.inline_steps = 0
+            self.task_run_overhead_secs: float | None = None
+
+    def observe(self, stage: str, label: str, secs: float):
+        with self._lock:
+            self.latencies.setdefault((stage, label), Histogram()).observe(
+                secs
+            )
+
+    @contextmanager
+    def timer(self, stage: str, label: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, label, time.perf_counter() - started)
+
+    def add_bytes(self, data_type: str, count: int):
+        with self._lock:
+            self.bytes_fetched[data_type] = (
+                self.bytes_fetched.get(data_type, 0) + count
+            )
+
+    def add_response(self, data_type: str, status_code: int):
+        with self._lock:
+            key = (data_type, status_code)
+            self.responses[key] = self.responses.get(key, 0) + 1
+
+    def add_rows(self, table: str, count: int):
+        with self._lock:
+            self.rows_written[table] = self.rows_written.get(table, 0) + count
+
+    def add_dropped(self, data_type: str, counts: dict[str, int]):
+        with self._lock:
+            for reason, count in counts.items():
+                if count:
+                    key = (data_type, reason)
+                    self.dropped[key] = self.dropped.get(key, 0) + count
+
+    def add_inline_step(self):
+        with self._lock:
+            self.inline_steps += 1
+
+    def set_task_run_overhead(self, secs: float):
+        with self._lock:
+            self.task_run_overhead_secs = secs
+
+    def lean_execution(self) -> dict:
+        saved = None
+        if self.task_run_overhead_secs is not None:
+            saved = round(self.inline_steps * self.task_run_overhead_secs, 3)
+        return {
+            "inline_steps": self.inline_steps,
+            "task_run_overhead_secs": self.task_run_overhead_secs,
+            "saved_secs_estimate": saved,
+        }
+
+    def not_modified_ratios(self) -> dict[str, float]:
+        totals: dict[str, int] = {}
+        not_modified: dict[str, int] = {}
+        for (data_type, status_code), count in self.responses.items():
+            totals[data_type] = totals.get(data_type, 0) + count
+            if status_code == 304:
+                not_modified[data_type] = (
+                    not_modified.get(data_type, 0) + count
+                )
+        return {
+            data_type: not_modified.get(data_type, 0) / total
+            for data_type, total in totals.items()
+        }
+
+    def report(self) -> dict:
+        with self._lock:
+            return {
+                "started": self.started.isoformat(),
+                "finished": datetime.now().isoformat(),
+                "stages": {
+                    f"{stage}:{label}": histogram.to_dict()
+                    for (stage, label), histogram in sorted(
+                        self.latencies.items()
+                    )
+                },
+                "bytes_fetched": dict(self.bytes_fetched),
+                "responses": {
+                    f"{data_type}:{status_code}": count
+                    for (data_type, status_code), count in sorted(
+                        self.responses.items()
+                    )
+                },
+                "not_modified_ratio": self.not_modified_ratios(),
+                "rows_written": dict(self.rows_written),
+                "dropped": {
+                    f"{data_type}:{reason}": count
+                    for (data_type, reason), count in sorted(
+                        self.dropped.items()
+                    )
+                },
+                "lean_execution": self.lean_execution(),
+            }
+
+    def to_prometheus(self) -> str:
+        lines = [
+            "# TYPE frc_syncer_stage_seconds histogram",
+        ]
+        with self._lock:
+            for (stage, label), histogram in sorted(self.latencies.items()):
+                labels = f'stage="{stage}",label="{label}"'
+                cumulative = 0
+                for bound, count in zip(
+                    LATENCY_BUCKETS, histogram.bucket_counts
+                ):
+                    cumulative += count
+                    lines.append(
+                        f"frc_syncer_stage_seconds_bucket{{{labels},"
+                        f'le="{bound}"}} {cumulative}'
+                    )
+                lines += [
+                    f"frc_syncer_stage_seconds_bucket{{{labels},"
+                    f'le="+Inf"}} {histogram.count}',
+                    f"frc_syncer_stage_seconds_sum{{{labels}}} "
+                    f"{histogram.sum}",
+                    f"frc_syncer_stage_seconds_count{{{labels}}} "
+                    f"{histogram.count}",
+                ]
+
+            lines.append("# TYPE frc_syncer_fetched_bytes_total counter")
+            lines += [
+                f'frc_syncer_fetched_bytes_total{{data_type="{data_type}"}} '
+                f"{count}"
+                for data_type, count in sorted(self.bytes_fetched.items())
+            ]
+            lines.append("# TYPE frc_syncer_responses_total counter")
+            lines += [
+                f'frc_syncer_responses_total{{data_type="{data_type}",'
+                f'status="{status_code}"}} {count}'
+                for (data_type, status_code), count in sorted(
+                    self.responses.items()
+                )
+            ]
+            lines.append("# TYPE frc_syncer_rows_written_total counter")
+            lines += [
+                f'frc_syncer_rows_written_total{{table="{table}"}} {count}'
+                for table, count in sorted(self.rows_written.items())
+            ]
+            lines.append("# TYPE frc_syncer_dropped_total counter")
+            lines += [
+                f'frc_syncer_dropped_total{{data_type="{data_type}",'
+                f'reason="{reason}"}} {count}'
+                for (data_type, reason), count in sorted(self.dropped.items())
+            ]
+            lines += [
+                "# TYPE frc_syncer_inline_steps_total counter",
+                f"frc_syncer_inline_steps_total {self.inline_steps}",
+            ]
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+def publish_run_metrics(name: str) -> dict:
+    """Writes the run report to METRICS_DIR and the current flow run."""
+    report = metrics.report()
+
+    if settings.METRICS_DIR:
+        metrics_dir = Path(settings.METRICS_DIR)
+        metrics_dir.mkdir(parents=True, exist_ok=True)
+        stamp = metrics.started.strftime("%Y%m%dT%H%M%S")
+        (metrics_dir / f"{name}-{stamp}.json").write_text(
+            json.dumps(report, indent=2)
+        )
+        # Written to a temp file first so the textfile collector never
+        # reads a partial file.
+        prom_file = metrics_dir / f"{name}.prom"
+        prom_file.with_suffix(".prom.tmp").write_text(metrics.to_prometheus())
+        prom_file.with_suffix(".prom.tmp").replace(prom_file)
+
+    create_markdown_artifact(
+        key=f"{name}-metrics",
+        markdown=f"```json\n{json.dumps(report, indent=2)}\n```",
+        description=f"Per-stage timings and throughput for {name}.",
+    )
+    return report
@@ -0,0 +1,178 @@
+from pathlib import Path
+from threading import Lock
+from typing import TYPE_CHECKING
+
+import orjson
+from services.metrics import metrics
+from settings import settings
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+# The column each exported table's season comes from; keys start with the
+# year. Teams are not tied to a season.
+SEASON_COLUMNS: dict[str, str | None] = {
+    "teams": None,
+    "districts": "year",
+    "events": "year",
+    "event-divisions": "parent_event_key",
+    "matches": "key",
+    "alliances": "key",
+    "alliance-score-breakdowns": "alliance_key",
+    "alliance-teams": "key",
+    "rankings": "event_key",
+}
+
+
+def row_season(table: str, row: dict) -> int | None:
+    column = SEASON_COLUMNS[table]
+    if column is None:
+        return None
+    value = row[column]
+    return value if isinstance(value, int) else int(value[:4])
+
+
+def _to_arrow(rows: list[dict]) -> "pa.Table":
+    import pyarrow as pa
+
+    # Nested values such as score breakdowns are kept as JSON text, since
+    # their shape changes from season to season.
+    return pa.Table.from_pylist(
+        [
+            {
+                column: (
+                    orjson.dumps(value).decode()
+                    if isinstance(value, (dict, list))
+                    else value
+                )
+                for column, value in row.items()
+            }
+            for row in rows
+        ]
+    )
+
+
+def _key_column(table: "pa.Table", keys: tuple[str, ...]) -> "pa.Array":
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    if len(keys) == 1:
+        return table[keys[0]]
+    return pc.binary_join_element_wise(
+        *[pc.cast(table[key], pa.string()) for key in keys], "|"
+    )
+
+
+class ParquetSink:
+    """Buffers synced rows and merges them into per-season Parquet files."""
+
+    def __init__(self, root: str):
+        # Imported here so that only syncs with the sink on need pyarrow.
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise RuntimeError(
+                "PARQUET_EXPORT_DIR requires pyarrow: pdm install -G parquet"
+            )
+        self.root = Path(root)
+        self._lock = Lock()
+        # Flushes write one after another, so older rows never replace
+        # newer ones in a season file.
+        self._flush_lock = Lock()
+        self._write_lock = Lock()
+        self._pending: dict[tuple[str, int | None], list[dict]] = {}
+        self._pending_rows = 0
+        self._keys: dict[str, tuple[str, ...]] = {}
+
+    def path(self, table: str, year: int | None) -> Path:
+        if year is None:
+            return self.root / table / "part-0.parquet"
+        return self.root / table / f"season={year}" / "part-0.parquet"
+
+    def add(self, table: str, rows: list[dict], keys: tuple[str, ...]):
+        if table not in SEASON_COLUMNS:
+            raise ValueError(f"No Parquet export for table {table}")
+
+        with self._lock:
+            self._keys[table] = keys
+            for row in rows:
+                self._pending.setdefault(
+                    (table, row_season(table, row)), []
+                ).append(row)
+            self._pending_rows += len(rows)
+            full = self._pending_rows >= settings.PARQUET_FLUSH_ROWS
+
+        if full:
+            self.flush()
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                self._pending_rows = 0
+
+            pending_items = list(pending.items())
+            for index, ((table, year), rows) in enumerate(pending_items):
+                try:
+                    self.write(table, year, rows, self._keys[table])
+                except Exception:
+                    # Put back what was not written, ahead of newer rows.
+                    with self._lock:
+                        for key, unwritten in pending_items[index:]:
+                            self._pending[key] = unwritten + self._pending.get(
+                                key, []
+                            )
+                            self._pending_rows += len(unwritten)
+                    raise
+
+    def write(
+        self,
+        table: str,
+        year: int | None,
+        rows: list[dict],
+        keys: tuple[str, ...],
+        merge: bool = True,
+    ):
+        """Writes rows to a table's season file, merged by key with `merge`."""
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        import pyarrow.parquet as pq
+
+        path = self.path(table, year)
+        with metrics.timer("export", table), self._write_lock:
+            rows = list(
+                {tuple(row[key] for key in keys): row for row in rows}.values()
+            )
+            data = _to_arrow(rows)
+            if merge and path.exists():
+                existing = pq.read_table(path)
+                replaced = pc.is_in(
+                    _key_column(existing, keys),
+                    value_set=_key_column(data, keys),
+                )
+                data = pa.concat_tables(
+                    [existing.filter(pc.invert(replaced)), data],
+                    promote_options="permissive",
+                )
+
+            path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = path.with_suffix(".parquet.tmp")
+            pq.write_table(
+                data, temp_path, compression=settings.PARQUET_COMPRESSION
+            )
+            temp_path.replace(path)
+
+
+_sink: ParquetSink | None = None
+_sink_lock = Lock()
+
+
+def get_parquet_sink() -> ParquetSink | None:
+    """Returns the shared sink, or None when PARQUET_EXPORT_DIR is unset."""
+    global _sink
+    if not settings.PARQUET_EXPORT_DIR:
+        return None
+    with _sink_lock:
+        if _sink is None:
+            _sink = ParquetSink(settings.PARQUET_EXPORT_DIR)
+        return _sink
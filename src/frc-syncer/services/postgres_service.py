@@ -0,0 +1,117 @@
+from contextlib import contextmanager
+from threading import local
+from typing import TYPE_CHECKING, Callable
+
+from settings import settings
+
+if TYPE_CHECKING:
+    import psycopg
+
+_local = local()
+
+
+def _connection() -> "psycopg.Connection":
+    # Imported here so that only the postgres backend needs psycopg.
+    try:
+        import psycopg
+    except ImportError:
+        raise RuntimeError(
+            "DB_BACKEND=postgres requires psycopg: pdm install -G postgres"
+        )
+    if not settings.POSTGRES_DSN:
+        raise ValueError("POSTGRES_DSN must be set when DB_BACKEND=postgres")
+
+    # One connection per thread, since events are synced concurrently.
+    connection = getattr(_local, "connection", None)
+    if connection is None or connection.closed:
+        connection = _local.connection = psycopg.connect(
+            settings.POSTGRES_DSN, autocommit=True
+        )
+    return connection
+
+
+@contextmanager
+def transaction():
+    """Runs this thread's upserts in one transaction; nested blocks join."""
+    if getattr(_local, "callbacks", None) is not None:
+        yield
+        return
+
+    _local.callbacks = callbacks = []
+    try:
+        with _connection().transaction():
+            yield
+    finally:
+        _local.callbacks = None
+    for callback in callbacks:
+        callback()
+
+
+def after_commit(callback: Callable[[], None]):
+    callbacks = getattr(_local, "callbacks", None)
+    if callbacks is None:
+        callback()
+    else:
+        callbacks.append(callback)
+
+
+def copy_upsert(table: str, rows: list[dict], keys: tuple[str, ...]):
+    """Loads rows into a staging table with COPY and merges them by key."""
+    from psycopg import sql
+    from psycopg.types.json import Jsonb
+
+    connection = _connection()
+    columns = list(rows[0])
+    target = sql.Identifier(table)
+    # Qualified, so a table of the same name on the search path is never
+    # dropped in its place.
+    stage = sql.Identifier("pg_temp", f"stage_{table.replace('-', '_')}")
+    column_list = sql.SQL(", ").join(map(sql.Identifier, columns))
+
+    updates = [column for column in columns if column not in keys]
+    if updates:
+        on_conflict = sql.SQL("DO UPDATE SET {}").format(
+            sql.SQL(", ").join(
+                sql.SQL("{0} = EXCLUDED.{0}").format(sql.Identifier(column))
+                for column in updates
+            )
+        )
+    else:
+        on_conflict = sql.SQL("DO NOTHING")
+
+    with connection.transaction(), connection.cursor() as cursor:
+        # Built from the selected columns only, without the target's
+        # constraints, so generated columns don't need values here.
+        cursor.execute(sql.SQL("DROP TABLE IF EXISTS {}").format(stage))
+        cursor.execute(
+            sql.SQL(
+                "CREATE TEMP TABLE {} ON COMMIT DROP AS "
+                "SELECT {} FROM {} WITH NO DATA"
+            ).format(stage, column_list, target)
+        )
+        with cursor.copy(
+            sql.SQL("COPY {} ({}) FROM STDIN").format(stage, column_list)
+        ) as copy:
+            for row in rows:
+                copy.write_row(
+                    [
+                        (
+                            Jsonb(value)
+                            if isinstance(value, (dict, list))
+                            else value
+                        )
+                        for value in map(row.get, columns)
+                    ]
+                )
+        cursor.execute(
+            sql.SQL(
+                "INSERT INTO {} ({}) SELECT {} FROM {} ON CONFLICT ({}) {}"
+            ).format(
+                target,
+                column_list,
+                column_list,
+                stage,
+                sql.SQL(", ").join(map(sql.Identifier, keys)),
+                on_conflict,
+            )
+        )
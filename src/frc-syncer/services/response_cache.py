@@ -0,0 +1,87 @@
+import gzip
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from requests.structures import CaseInsensitiveDict
+from settings import settings
+
+
+class CachedResponse:
+    """Stands in for a TBA response when replaying from the local cache."""
+
+    def __init__(self, status_code: int, content: bytes = b"", etag=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = CaseInsensitiveDict({"ETag": etag} if etag else {})
+
+    def json(self):
+        return json.loads(self.content)
+
+    def iter_body(self):
+        yield self.content
+
+    def close(self):
+        pass
+
+
+def _entry_dir(path: str, year: int) -> Path:
+    return Path(settings.RESPONSE_CACHE_DIR, str(year), *path.split("/"))
+
+
+def _write_atomic(target: Path, data: bytes):
+    tmp = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, target)
+
+
+class CacheWriter:
+    """Writes a response body to `<dir>/<year>/<path>/<digest>.json.gz`."""
+
+    def __init__(self, path: str, year: int, etag: str | None):
+        self._etag = etag
+        self._entry_dir = _entry_dir(path, year)
+        self._entry_dir.mkdir(parents=True, exist_ok=True)
+        self._digest = hashlib.sha256(etag.encode() if etag else b"")
+        self._tmp = self._entry_dir / f".{os.getpid()}.{id(self)}.tmp"
+        self._file = gzip.open(self._tmp, "wb")
+
+    def write(self, chunk: bytes):
+        self._file.write(chunk)
+        if not self._etag:
+            self._digest.update(chunk)
+
+    def commit(self):
+        self._file.close()
+        digest = self._digest.hexdigest()[:32]
+        body_file = self._entry_dir / f"{digest}.json.gz"
+        if body_file.exists():
+            self._tmp.unlink()
+        else:
+            os.replace(self._tmp, body_file)
+
+        _write_atomic(
+            self._entry_dir / "latest.json",
+            json.dumps({"etag": self._etag, "file": body_file.name}).encode(),
+        )
+
+    def discard(self):
+        self._file.close()
+        self._tmp.unlink(missing_ok=True)
+
+
+def store(path: str, year: int, etag: str | None, content: bytes):
+    writer = CacheWriter(path, year, etag)
+    writer.write(content)
+    writer.commit()
+
+
+def load(path: str, year: int) -> CachedResponse:
+    entry_dir = _entry_dir(path, year)
+    try:
+        latest = json.loads((entry_dir / "latest.json").read_bytes())
+        content = gzip.decompress((entry_dir / latest["file"]).read_bytes())
+    except FileNotFoundError:
+        return CachedResponse(404)
+    return CachedResponse(200, content, etag=latest["etag"])
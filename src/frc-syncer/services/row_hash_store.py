@@ -0,0 +1,92 @@
+import hashlib
+import sqlite3
+from itertools import batched
+from threading import Lock
+
+import orjson
+from settings import settings
+
+
+def hash_row(row: dict) -> str:
+    return hashlib.blake2b(
+        orjson.dumps(row, option=orjson.OPT_SORT_KEYS), digest_size=16
+    ).hexdigest()
+
+
+class RowHashStore:
+    """SQLite record of the content hash of every row written."""
+
+    def __init__(self, path: str):
+        self._lock = Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS row_hashes ("
+                "table_name TEXT NOT NULL, "
+                "row_key TEXT NOT NULL, "
+                "row_hash TEXT NOT NULL, "
+                "PRIMARY KEY (table_name, row_key)"
+                ") WITHOUT ROWID"
+            )
+
+    def _stored_hashes(self, table: str, keys: list[str]) -> dict[str, str]:
+        stored = {}
+        with self._lock:
+            for chunk in batched(keys, 500):
+                stored.update(
+                    self._connection.execute(
+                        "SELECT row_key, row_hash FROM row_hashes "
+                        "WHERE table_name = ? AND row_key IN "
+                        f"({', '.join('?' * len(chunk))})",
+                        (table, *chunk),
+                    ).fetchall()
+                )
+        return stored
+
+    def filter_changed(
+        self, table: str, rows: list[dict], key_columns: tuple[str, ...]
+    ) -> tuple[list[dict], list[tuple[str, str]]]:
+        """Returns the changed rows and the `(key, hash)` pairs to `record`."""
+        hashed = {
+            "|".join(str(row[column]) for column in key_columns): (
+                hash_row(row),
+                row,
+            )
+            for row in rows
+        }
+        stored = self._stored_hashes(table, list(hashed))
+
+        changed_rows = []
+        pending = []
+        for key, (row_hash, row) in hashed.items():
+            if stored.get(key) != row_hash:
+                changed_rows.append(row)
+                pending.append((key, row_hash))
+        return changed_rows, pending
+
+    def record(self, table: str, pending: list[tuple[str, str]]):
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO row_hashes "
+                "(table_name, row_key, row_hash) VALUES (?, ?, ?)",
+                [(table, key, row_hash) for key, row_hash in pending],
+            )
+
+    def reset(self):
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM row_hashes")
+
+
+_store: RowHashStore | None = None
+_store_lock = Lock()
+
+
+def get_row_hash_store() -> RowHashStore | None:
+    """Returns the shared store, or None when ROW_HASH_STORE_PATH is unset."""
+    global _store
+    if not settings.ROW_HASH_STORE_PATH:
+        return None
+    with _store_lock:
+        if _store is None:
+            _store = RowHashStore(settings.ROW_HASH_STORE_PATH)
+        return _store
@@ -0,0 +1,352 @@
+import os
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from threading import Lock
+
+import requests
+from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from services import response_cache
+from services.metrics import metrics
+from settings import settings
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+_dotenv_loaded = False
+
+
+def get_headers() -> dict[str, str]:
+    """Returns the auth headers, read from the environment on each call."""
+    global _dotenv_loaded
+    if not _dotenv_loaded:
+        load_dotenv()
+        _dotenv_loaded = True
+    return {"X-TBA-Auth-Key": os.getenv("TBA_API_KEY", "")}
+
+
+def _create_client():
+    # Both clients keep connections alive and negotiate gzip (and brotli
+    # when a brotli decoder is installed) on their own.
+    if settings.TBA_HTTP2 and httpx is not None:
+        try:
+            return httpx.Client(
+                http2=True,
+                timeout=settings.TBA_TIMEOUT_SECS,
+                limits=httpx.Limits(
+                    max_connections=settings.TBA_POOL_MAXSIZE,
+                    max_keepalive_connections=settings.TBA_POOL_MAXSIZE,
+                ),
+            )
+        except ImportError:
+            print(
+                "TBA: h2 is not installed (pdm install -G http2). "
+                "Falling back to HTTP/1.1."
+            )
+
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=settings.TBA_POOL_MAXSIZE,
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+_client = None
+_client_lock = Lock()
+
+
+def get_client():
+    """Returns the HTTP client for TBA, creating it on first use."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = _create_client()
+        return _client
+
+
+def set_client(client):
+    """Replaces the HTTP client, or resets it with None."""
+    global _client
+    with _client_lock:
+        _client = client
+
+
+class RateLimiter:
+    """Adaptive token bucket shared by every TBA request."""
+
+    INCREASE_PER_RESPONSE = 0.05
+    DECREASE_FACTOR = 0.5
+
+    def __init__(self):
+        self.rate = settings.TBA_INITIAL_REQUESTS_PER_SEC
+        self._tokens = float(settings.TBA_REQUEST_BURST)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(
+            self._tokens + (now - self._updated) * self.rate,
+            settings.TBA_REQUEST_BURST,
+        )
+        self._updated = now
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                wait = self._paused_until - now
+                if wait <= 0:
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def on_response(self, status_code: int, retry_after: float | None):
+        with self._lock:
+            if status_code == 429:
+                self.rate = max(
+                    self.rate * self.DECREASE_FACTOR,
+                    settings.TBA_MIN_REQUESTS_PER_SEC,
+                )
+                self._paused_until = max(
+                    self._paused_until,
+                    time.monotonic() + (retry_after or 1 / self.rate),
+                )
+                return
+
+            if status_code == 304:
+                self._tokens = min(
+                    self._tokens + 1 - settings.TBA_NOT_MODIFIED_COST,
+                    settings.TBA_REQUEST_BURST,
+                )
+            if status_code < 500:
+                self.rate = min(
+                    self.rate + self.INCREASE_PER_RESPONSE,
+                    settings.TBA_MAX_REQUESTS_PER_SEC,
+                )
+
+
+rate_limiter = RateLimiter()
+
+# Paths TBA told us (via Cache-Control max-age) not to ask about again yet,
+# with the expiry and the ETag of the data it sent.
+_fresh_until: dict[str, tuple[float, str | None]] = {}
+
+
+def _parse_retry_after(value: str | None) -> float | None:
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0)
+
+
+def _parse_max_age(value: str | None) -> float | None:
+    for directive in (value or "").split(","):
+        name, _, age = directive.strip().partition("=")
+        if name.lower() == "max-age" and age.isdigit():
+            return float(age)
+    return None
+
+
+def _release(response):
+    """Reads the rest of a short body and closes the response.
+
+    A streamed response closed with its body unread can take its pooled
+    connection down with it.
+    """
+    if httpx is not None and isinstance(response, httpx.Response):
+        response.read()
+    else:
+        for _ in response.iter_content(chunk_size=64 * 1024):
+            pass
+    response.close()
+
+
+class StreamedResponse:
+    """A TBA response whose body is read in chunks by `iter_body`."""
+
+    def __init__(
+        self,
+        response,
+        path: str,
+        year: int,
+        data_type: str,
+        fetch_secs: float,
+    ):
+        self._response = response
+        self._path = path
+        self._year = year
+        self._data_type = data_type
+        self._fetch_secs = fetch_secs
+        self._closed = False
+        self.status_code = response.status_code
+        self.headers = response.headers
+
+    def _iter_chunks(self):
+        if httpx is not None and isinstance(self._response, httpx.Response):
+            chunks = iter(self._response.iter_bytes())
+        else:
+            chunks = iter(self._response.iter_content(chunk_size=64 * 1024))
+        while True:
+            started = time.perf_counter()
+            chunk = next(chunks, None)
+            self._fetch_secs += time.perf_counter() - started
+            if chunk is None:
+                return
+            metrics.add_bytes(self._data_type, len(chunk))
+            yield chunk
+
+    def iter_body(self):
+        chunks = self._iter_chunks()
+
+        if self.status_code != 200 or not settings.RESPONSE_CACHE_DIR:
+            yield from chunks
+            return
+
+        writer = response_cache.CacheWriter(
+            self._path, self._year, self.headers.get("ETag")
+        )
+        try:
+            for chunk in chunks:
+                writer.write(chunk)
+                yield chunk
+        except BaseException:
+            writer.discard()
+            raise
+        writer.commit()
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            metrics.observe("fetch", self._data_type, self._fetch_secs)
+        if self.status_code == 200:
+            # Dropping the connection is cheaper than reading the rest of
+            # a body that was given up on.
+            self._response.close()
+        else:
+            _release(self._response)
+
+
+def _send(url: str, headers: dict | None, stream: bool):
+    # The key is sent per request so a rotated TBA_API_KEY takes effect.
+    headers = {**get_headers(), **(headers or {})}
+    client = get_client()
+    if httpx is not None and isinstance(client, httpx.Client):
+        request = client.build_request(
+            "GET", url, headers=headers, timeout=settings.TBA_TIMEOUT_SECS
+        )
+        return client.send(request, stream=stream)
+    return client.get(
+        url,
+        headers=headers,
+        timeout=settings.TBA_TIMEOUT_SECS,
+        stream=stream,
+    )
+
+
+def _data_type(path: str) -> str:
+    # "teams/2024/0" and "events/2024", or "event/2024cmp/matches".
+    if path.startswith("event/"):
+        return path.rsplit("/", 1)[1]
+    return path.split("/", 1)[0]
+
+
+def _get(
+    path: str, year: int, etag: str | None = None, stream: bool = False
+) -> requests.Response:
+    data_type = _data_type(path)
+    started = time.perf_counter()
+    response = _request(path, year, etag, stream)
+    fetch_secs = time.perf_counter() - started
+    metrics.add_response(data_type, response.status_code)
+
+    if stream and not isinstance(response, response_cache.CachedResponse):
+        return StreamedResponse(response, path, year, data_type, fetch_secs)
+
+    metrics.observe("fetch", data_type, fetch_secs)
+    metrics.add_bytes(data_type, len(response.content))
+    return response
+
+
+def _request(
+    path: str, year: int, etag: str | None, stream: bool
+) -> requests.Response:
+    if settings.TBA_OFFLINE_REPLAY:
+        return response_cache.load(path, year)
+
+    # With the ETag of fresh data we already hold it, and TBA would only
+    # answer 304.
+    expires, fresh_etag = _fresh_until.get(path, (0, None))
+    if etag and etag == fresh_etag and expires > time.monotonic():
+        return response_cache.CachedResponse(304, etag=etag)
+
+    headers = {"If-None-Match": etag} if etag else None
+    for attempt in range(settings.TBA_MAX_RETRIES + 1):
+        rate_limiter.acquire()
+        response = _send(f"{settings.TBA_BASE_URL}/{path}", headers, stream)
+        rate_limiter.on_response(
+            response.status_code,
+            _parse_retry_after(response.headers.get("Retry-After")),
+        )
+        if response.status_code != 429:
+            break
+        _release(response)
+        print(f"TBA: Rate limited on {path}. Attempt {attempt + 1}.")
+
+    max_age = _parse_max_age(response.headers.get("Cache-Control"))
+    if max_age and response.status_code in (200, 304):
+        _fresh_until[path] = (
+            time.monotonic() + max_age,
+            response.headers.get("ETag") or etag,
+        )
+
+    if (
+        not stream
+        and response.status_code == 200
+        and settings.RESPONSE_CACHE_DIR
+    ):
+        response_cache.store(
+            path, year, response.headers.get("ETag"), response.content
+        )
+
+    return response
+
+
+def get_teams_page(
+    year: int, page_num: int, etag: str | None = None
+) -> requests.Response:
+    return _get(f"teams/{year}/{page_num}", year, etag)
+
+
+def get_events(year: int, etag: str | None = None) -> requests.Response:
+    return _get(f"events/{year}", year, etag)
+
+
+def stream_event_matches(
+    event_key: str, etag: str | None = None
+) -> StreamedResponse:
+    """Requests an event's matches without reading the body up front."""
+    return _get(
+        f"event/{event_key}/matches", int(event_key[:4]), etag, stream=True
+    )
+
+
+def get_event_rankings(
+    event_key: str, etag: str | None = None
+) -> requests.Response:
+    return _get(f"event/{event_key}/rankings", int(event_key[:4]), etag)
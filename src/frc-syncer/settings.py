@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings
 
 
@@ -28,5 +30,75 @@ class Settings(BaseSettings):
         2024,
     ]
 
+    EVENT_SYNC_CONCURRENCY: int = 4
+    TEAM_PAGE_CONCURRENCY: int = 4
+
+    TBA_BASE_URL: str = "https://www.thebluealliance.com/api/v3"
+    TBA_TIMEOUT_SECS: float = 30
+    TBA_POOL_MAXSIZE: int = 16
+    TBA_HTTP2: bool = False
+    TBA_INITIAL_REQUESTS_PER_SEC: float = 2
+    TBA_MIN_REQUESTS_PER_SEC: float = 0.2
+    TBA_MAX_REQUESTS_PER_SEC: float = 10
+    TBA_REQUEST_BURST: int = 5
+    TBA_NOT_MODIFIED_COST: float = 0.25
+    TBA_MAX_RETRIES: int = 3
+
+    SEASON_SYNC_CONCURRENCY: int = 1
+    LEAN_EXECUTION: bool = False
+
+    EXCLUDED_EVENT_TYPES: list[str] = [
+        "Offseason",
+        "Preseason",
+        "Unlabeled",
+        "Unknown",
+        "Remote",
+        "--",
+    ]
+    BLACKLISTED_EVENT_KEYS: list[str] = [
+        "2020dar",
+        "2020carv",
+        "2020gal",
+        "2020hop",
+        "2020new",
+        "2020roe",
+        "2020tur",
+    ]
+    BLACKLISTED_TEAM_KEYS: list[str] = ["frc0"]
+    SYNC_EVENT_DIVISIONS: bool = False
+
+    LIVE_POLL_MIN_SECS: float = 60
+    LIVE_POLL_MAX_SECS: float = 900
+    LIVE_POLL_BACKOFF: float = 2
+    LIVE_EVENT_DATE_SLACK_DAYS: int = 1
+
+    SYNC_SETTLE_DAYS: int = 7
+
+    METRICS_DIR: str | None = None
+
+    RESPONSE_CACHE_DIR: str | None = None
+    TBA_OFFLINE_REPLAY: bool = False
+
+    ROW_HASH_STORE_PATH: str | None = None
+
+    CHECKPOINT_PATH: str | None = None
+
+    ETAG_FLUSH_INTERVAL: int = 50
+
+    DB_BACKEND: Literal["supabase", "postgres"] = "supabase"
+    POSTGRES_DSN: str | None = None
+
+    PARQUET_EXPORT_DIR: str | None = None
+    PARQUET_COMPRESSION: str = "zstd"
+    PARQUET_FLUSH_ROWS: int = 100_000
+
+    DB_UPSERT_BATCH_ROWS: int = 1000
+    DB_UPSERT_BATCH_BYTES: int = 1_000_000
+    DB_UPSERT_CONCURRENCY: int = 4
+    DB_DEFERRED_UPSERT_CONCURRENCY: int = 4
+
+    MATCH_STREAM_BATCH_SIZE: int = 250
+    SPLIT_SCORE_BREAKDOWNS: bool = False
+
 
 settings = Settings()
@@ -0,0 +1,30 @@
+from prefect import task
+from services.db_service import TABLE_KEYS, get_table_rows
+from services.parquet_sink import get_parquet_sink
+
+
+@task(
+    name="Parquet Export: Export Table",
+    retries=3,
+    retry_delay_seconds=15,
+)
+def export_table(table: str, year: int | None = None) -> int:
+    rows = get_table_rows(table, year)
+    if rows:
+        get_parquet_sink().write(
+            table, year, rows, TABLE_KEYS[table], merge=False
+        )
+    return len(rows)
+
+
+# Rows that fail to write stay buffered in the sink, so a retry picks them
+# up again.
+@task(
+    name="Parquet Export: Flush",
+    retries=3,
+    retry_delay_seconds=15,
+)
+def flush_parquet_export():
+    parquet_sink = get_parquet_sink()
+    if parquet_sink:
+        parquet_sink.flush()
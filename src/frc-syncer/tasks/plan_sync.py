@@ -0,0 +1,46 @@
+from datetime import date, timedelta
+
+from models.sync_plan import SeasonPlan
+from prefect import task
+from services.db_service import get_event_dates_for_year, get_last_sync_time
+from services.etag_cache import get_etag_cache
+from settings import settings
+
+
+@task(
+    name="Plan Season Sync",
+    description="Decides which endpoints of a season can have changed.",
+    retries=3,
+    retry_delay_seconds=15,
+)
+def plan_season_sync(year: int) -> SeasonPlan:
+    plan = SeasonPlan(year=year)
+
+    last_sync = get_last_sync_time(year)
+    if last_sync is None:
+        print(plan.summary())
+        return plan
+
+    today = date.today()
+    synced_on = last_sync.date()
+    settle = timedelta(days=settings.SYNC_SETTLE_DAYS)
+    event_dates = get_event_dates_for_year(year)
+
+    if event_dates and year < today.year:
+        season_end = max(end for _, end in event_dates.values())
+        if season_end + settle < synced_on:
+            plan.skip_reason = f"ended {season_end}, last synced {synced_on}"
+            print(plan.summary())
+            return plan
+
+    etag_cache = get_etag_cache(year)
+    for event_key, (start, end) in event_dates.items():
+        for data_type in ("matches", "rankings"):
+            endpoint = f"events/{event_key}/{data_type}"
+            if start > today:
+                plan.skipped_endpoints[endpoint] = "not started"
+            elif etag_cache.get(endpoint) and end + settle < synced_on:
+                plan.skipped_endpoints[endpoint] = "ended before last sync"
+
+    print(plan.summary())
+    return plan
@@ -1,126 +1,104 @@
-import os
-import time
+from concurrent.futures import wait
+from itertools import batched
 
-import requests
+from models.filter_rules import FilterRules, get_filter_rules
+from models.tba.match import Match, MatchRows
 from prefect import task
-from models.tba.match import Match
-from models.tba.tba_page_etag import TBAPageEtag
 from services.db_service import (
-    get_event_keys_for_year,
-    get_tba_page_etag,
-    upsert_event_matches,
-    upsert_tba_page_etag,
+    event_transaction,
+    upsert_event_match_rows,
+    wait_for_upserts,
 )
-
-HEADERS = {"X-TBA-Auth-Key": os.getenv("TBA_API_KEY")}
+from services.etag_cache import get_etag_cache
+from services.metrics import metrics
+from services.tba_service import StreamedResponse, stream_event_matches
+from settings import settings
+from utils.json_stream import iter_json_array
+from utils.steps import run_step
 
 
 @task(
-    name="Match Sync: Prepare Headers",
+    name="Match Sync: Prepare ETag",
     retries=3,
     retry_delay_seconds=15,
 )
-def prepare_event_matches_headers(event_key, year: int):
-    etag = get_tba_page_etag(
-        page_num=None,
-        year=year,
-        endpoint=f"events/{event_key}/matches",
-    )
-    headers = HEADERS.copy()
-    if etag:
-        headers["If-None-Match"] = etag.etag
-    return headers
-
-
-@task(
-    name="Match Sync: Fetch Event Matches Data",
-    retries=3,
-    retry_delay_seconds=15,
-)
-def fetch_event_matches_page_data(
-    event_key: str, headers
-) -> requests.Response:
-    url = f"https://www.thebluealliance.com/api/v3/event/{
-        event_key}/matches"
-    return requests.get(url, headers=headers)
-
-
-@task(
-    name="Match Sync: Process Event Matches Response",
-    retries=3,
-    retry_delay_seconds=15,
-)
-def process_event_teams_response(response):
-    if response.status_code == 304:
-        print("Event Matches: ETAG match. Skipping.")
-        return None
-    elif response.status_code != 200:
-        print(
-            f"Event Matches: Failed to fetch event teams. Status Code: {
-              response.status_code}"
-        )
-        return None
-
-    return [Match.from_tba(match) for match in response.json()]
-
-
-@task(
-    name="Match Sync: Upsert Event Matches Data",
-    retries=3,
-    retry_delay_seconds=15,
-)
-def upsert_event_matches_data(event_key, matches, response, year: int):
-    if matches:
-        upsert_event_matches(matches)
-        print(f"Event Matches ({event_key}): Fetched {len(matches)} matches.")
-
-    if response.status_code == 200:
-        existing_etag = get_tba_page_etag(
-            page_num=None,
-            year=year,
-            endpoint=f"events/{event_key}/matches",
-        )
-
-        etag = response.headers.get("ETag")
-        upsert_tba_page_etag(
-            TBAPageEtag(
-                id=existing_etag.id if existing_etag else None,
-                page_num=None,
-                year=year,
-                endpoint=f"events/{event_key}/matches",
-                etag=etag,
+def prepare_event_matches_etag(event_key, year: int) -> str | None:
+    return get_etag_cache(year).get(f"events/{event_key}/matches")
+
+
+def filter_matches(rows: MatchRows, rules: FilterRules) -> MatchRows:
+    rows, dropped = rules.filter_matches(rows)
+    metrics.add_dropped("matches", dropped)
+    return rows
+
+
+def process_event_matches_response(
+    event_key: str, response: StreamedResponse
+) -> int | None:
+    """Parses, filters and upserts matches as the body streams in."""
+    deferred = []
+    try:
+        if response.status_code == 304:
+            print("Event Matches: ETAG match. Skipping.")
+            return None
+        elif response.status_code != 200:
+            # Raising keeps the event out of the checkpoint journal, so a
+            # resumed run fetches it again.
+            raise RuntimeError(
+                f"Event Matches ({event_key}): Failed to fetch event "
+                f"matches. Status Code: {response.status_code}"
             )
-        )
-
 
+        rules = get_filter_rules()
+        match_count = 0
+        with event_transaction():
+            for matches in batched(
+                iter_json_array(response.iter_body()),
+                settings.MATCH_STREAM_BATCH_SIZE,
+            ):
+                with metrics.timer("parse", "matches"):
+                    rows = Match.rows_from_tba(matches)
+                with metrics.timer("filter", "matches"):
+                    rows = filter_matches(rows, rules)
+                deferred += upsert_event_match_rows(rows)
+                match_count += len(rows.matches)
+    finally:
+        # A failed event's deferred writes still finish here, rather than
+        # during whichever event runs next.
+        wait(deferred)
+        response.close()
+    wait_for_upserts(deferred)
+
+    if match_count:
+        print(f"Event Matches ({event_key}): Fetched {match_count} matches.")
+    return match_count
+
+
+# The body streams into the upserts, so the request and the parsing share
+# one task: a retry requests the matches again.
 @task(
-    name="Match Sync: Filter Matches",
+    name="Match Sync: Fetch And Process Event Matches",
     retries=3,
     retry_delay_seconds=15,
 )
-def filter_matches(matches: list[Match]):
-    teams_blacklist: list[str] = ["frc0"]
-    filtered_matches = []
-
-    for match in matches:
-        for alliance in match.alliances:
-            alliance.teams = [
-                team
-                for team in alliance.teams
-                if team.team_key not in teams_blacklist
-            ]
-        filtered_matches.append(match)
-
-    return filtered_matches
+def fetch_event_matches(
+    event_key: str, etag: str | None
+) -> tuple[int | None, str | None]:
+    """Returns the match count and, when the matches changed, their ETag."""
+    response = stream_event_matches(event_key, etag=etag)
+    match_count = process_event_matches_response(event_key, response)
+    if response.status_code != 200:
+        return match_count, None
+    return match_count, response.headers.get("ETag")
 
 
 @task(
-    name="Match Sync: Throttle Request",
+    name="Match Sync: Save Event Matches ETag",
     retries=3,
     retry_delay_seconds=15,
 )
-def throttle_request(interval_secs=15):
-    time.sleep(interval_secs)
+def save_event_matches_etag(event_key, etag: str | None, year: int):
+    get_etag_cache(year).set(f"events/{event_key}/matches", etag)
 
 
 @task(
@@ -128,28 +106,11 @@ def throttle_request(interval_secs=15):
     retries=3,
     retry_delay_seconds=15,
 )
-def sync_event_matches(event_key: str, year: int):
-    headers = prepare_event_matches_headers(event_key, year)
-    response = fetch_event_matches_page_data(event_key, headers)
-    matches = process_event_teams_response(response)
-
-    if matches:
-        matches = filter_matches(matches)
-
-    upsert_event_matches_data(event_key, matches, response, year=year)
-    throttle_request()
-
-
-@task(
-    name="Fetch Event Matches",
-    description="Fetches all matches for all events.",
-    tags=["tba"],
-    version="1.0",
-    retries=3,
-    retry_delay_seconds=15,
-)
-def sync_all_event_matches(year: int):
-    event_keys = get_event_keys_for_year(year=year)
+def sync_event_matches(event_key: str, year: int) -> bool:
+    etag = run_step(prepare_event_matches_etag, event_key, year)
+    match_count, etag = run_step(
+        fetch_event_matches, event_key, etag, retry=True
+    )
+    run_step(save_event_matches_etag, event_key, etag, year=year)
 
-    for event_key in event_keys:
-        sync_event_matches(event_key, year)
+    return bool(match_count)
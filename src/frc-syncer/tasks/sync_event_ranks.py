@@ -1,35 +1,20 @@
-import os
-import time
-
 import requests
-from prefect import task
 from models.tba.ranking import Ranking
-from models.tba.tba_page_etag import TBAPageEtag
-from services.db_service import (
-    get_event_keys_for_year,
-    get_tba_page_etag,
-    upsert_event_rankings,
-    upsert_tba_page_etag,
-)
-
-HEADERS = {"X-TBA-Auth-Key": os.getenv("TBA_API_KEY")}
+from prefect import task
+from services.db_service import upsert_event_rankings
+from services.etag_cache import get_etag_cache
+from services.metrics import metrics
+from services.tba_service import get_event_rankings
+from utils.steps import run_step
 
 
 @task(
-    name="Rank Sync: Prepare Headers",
+    name="Rank Sync: Prepare ETag",
     retries=3,
     retry_delay_seconds=15,
 )
-def prepare_event_matches_headers(event_key, year: int):
-    etag = get_tba_page_etag(
-        page_num=None,
-        year=year,
-        endpoint=f"events/{event_key}/rankings",
-    )
-    headers = HEADERS.copy()
-    if etag:
-        headers["If-None-Match"] = etag.etag
-    return headers
+def prepare_event_rankings_etag(event_key, year: int) -> str | None:
+    return get_etag_cache(year).get(f"events/{event_key}/rankings")
 
 
 @task(
@@ -37,11 +22,8 @@ def prepare_event_matches_headers(event_key, year: int):
     retries=3,
     retry_delay_seconds=15,
 )
-def fetch_event_rankings_page_data(
-    event_key: str, headers
-) -> requests.Response:
-    url = f"https://www.thebluealliance.com/api/v3/event/{event_key}/rankings"
-    return requests.get(url, headers=headers)
+def fetch_event_rankings_page_data(event_key: str, etag) -> requests.Response:
+    return get_event_rankings(event_key, etag=etag)
 
 
 @task(
@@ -60,10 +42,11 @@ def process_event_rankings_response(response, event_key: str):
         )
         return None
 
-    return [
-        Ranking.from_tba(rank, event_key)
-        for rank in response.json()["rankings"]
-    ]
+    with metrics.timer("parse", "rankings"):
+        return [
+            Ranking.from_tba(rank, event_key)
+            for rank in response.json()["rankings"]
+        ]
 
 
 @task(
@@ -79,56 +62,34 @@ def upsert_event_rankings_data(event_key, rankings, response, year: int):
         )
 
     if response.status_code == 200:
-        existing_etag = get_tba_page_etag(
-            page_num=None,
-            year=year,
-            endpoint=f"events/{event_key}/rankings",
-        )
-
-        etag = response.headers.get("ETag")
-        upsert_tba_page_etag(
-            TBAPageEtag(
-                id=existing_etag.id if existing_etag else None,
-                page_num=None,
-                year=year,
-                endpoint=f"events/{event_key}/rankings",
-                etag=etag,
-            )
+        get_etag_cache(year).set(
+            f"events/{event_key}/rankings", response.headers.get("ETag")
         )
 
 
-@task(
-    name="Rank Sync: Throttle Request",
-    retries=3,
-    retry_delay_seconds=15,
-)
-def throttle_request(interval_secs=5):
-    time.sleep(interval_secs)
-
-
 @task(
     name="Rank Sync: Sync Event Ranks",
     retries=3,
     retry_delay_seconds=15,
 )
-def sync_event_ranks(event_key: str, year: int):
-    headers = prepare_event_matches_headers(event_key, year)
-    response = fetch_event_rankings_page_data(event_key, headers)
-    rankings = process_event_rankings_response(response, event_key)
-    upsert_event_rankings_data(event_key, rankings, response, year)
-    throttle_request()
-
-
-@task(
-    name="Sync All Event Rankings",
-    description="Syncs all event rankings for a given year",
-    tags=["tba"],
-    version="1.0",
-    retries=3,
-    retry_delay_seconds=15,
-)
-def sync_all_event_rankings(year: int):
-    event_keys = get_event_keys_for_year(year=year)
+def sync_event_ranks(event_key: str, year: int) -> bool:
+    etag = run_step(prepare_event_rankings_etag, event_key, year)
+    response = run_step(
+        fetch_event_rankings_page_data, event_key, etag, retry=True
+    )
+    rankings = run_step(process_event_rankings_response, response, event_key)
+    run_step(
+        upsert_event_rankings_data,
+        event_key,
+        rankings,
+        response,
+        year,
+        retry=True,
+    )
 
-    for event_key in event_keys:
-        sync_event_ranks(event_key, year)
+    if response.status_code not in (200, 304):
+        raise RuntimeError(
+            f"Event Rankings ({event_key}): Failed to fetch. Status Code: "
+            f"{response.status_code}"
+        )
+    return bool(rankings)
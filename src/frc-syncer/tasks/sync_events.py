@@ -1,29 +1,21 @@
-import os
-
 import requests
-from prefect import task
+from models.filter_rules import FilterRules, get_filter_rules
 from models.tba.event import Event
-from models.tba.tba_page_etag import TBAPageEtag
-from services.db_service import (
-    get_tba_page_etag,
-    upsert_events,
-    upsert_tba_page_etag,
-)
-
-HEADERS = {"X-TBA-Auth-Key": os.getenv("TBA_API_KEY")}
+from prefect import task
+from services.db_service import upsert_events
+from services.etag_cache import get_etag_cache
+from services.metrics import metrics
+from services.tba_service import get_events
+from utils.steps import run_step
 
 
 @task(
-    name="Event Sync: Prepare Headers",
+    name="Event Sync: Prepare ETag",
     retries=3,
     retry_delay_seconds=15,
 )
-def prepare_event_headers(year: int):
-    etag = get_tba_page_etag(page_num=None, year=year, endpoint="events")
-    headers = HEADERS.copy()
-    if etag:
-        headers["If-None-Match"] = etag.etag
-    return headers
+def prepare_event_etag(year: int) -> str | None:
+    return get_etag_cache(year).get("events")
 
 
 @task(
@@ -31,9 +23,8 @@ def prepare_event_headers(year: int):
     retries=3,
     retry_delay_seconds=15,
 )
-def fetch_event_data(headers, year: int):
-    url = f"https://www.thebluealliance.com/api/v3/events/{year}"
-    return requests.get(url, headers=headers)
+def fetch_event_data(etag, year: int) -> requests.Response:
+    return get_events(year, etag=etag)
 
 
 @task(
@@ -51,7 +42,8 @@ def process_event_response(response):
               response.status_code}"
         )
         return None
-    return [Event.from_tba(item) for item in response.json()]
+    with metrics.timer("parse", "events"):
+        return [Event.from_tba(item) for item in response.json()]
 
 
 @task(
@@ -59,40 +51,14 @@ def process_event_response(response):
     retries=3,
     retry_delay_seconds=15,
 )
-def filter_events(events: list[Event]):
-
-    event_blacklist = [
-        "2020dar",
-        "2020carv",
-        "2020gal",
-        "2020hop",
-        "2020new",
-        "2020roe",
-        "2020tur",
-    ]
-
-    events = [
-        event
-        for event in events
-        if event.event_type != "Offseason"
-        and event.event_type != "Preseason"
-        and event.event_type != "Unlabeled"
-        and event.event_type != "Unknown"
-        and event.event_type != "Remote"
-        and event.event_type != "--"
-    ]
-
-    for event in events:
-        if event.key in event_blacklist:
-            events.remove(event)
-
-        event.divisions = [
-            division
-            for division in event.divisions
-            if division.division_event_key not in event_blacklist
-            and division.parent_event_key not in event.key
-        ]
-
+def filter_events(events: list[Event], rules: FilterRules) -> list[Event]:
+    events, dropped = rules.filter_events(events)
+    metrics.add_dropped("events", dropped)
+    if dropped:
+        reasons = ", ".join(
+            f"{count} {reason}" for reason, count in dropped.most_common()
+        )
+        print(f"Events: Dropped {reasons}.")
     return events
 
 
@@ -103,22 +69,7 @@ def upsert_event_data(events, response, year: int):
         print(f"Events: Fetched {len(events)} events.")
 
     if response.status_code == 200:
-        existing_etag = get_tba_page_etag(
-            page_num=None,
-            year=year,
-            endpoint="events",
-        )
-
-        etag = response.headers.get("ETag")
-        upsert_tba_page_etag(
-            TBAPageEtag(
-                id=existing_etag.id if existing_etag else None,
-                page_num=None,
-                year=year,
-                endpoint="events",
-                etag=etag,
-            )
-        )
+        get_etag_cache(year).set("events", response.headers.get("ETag"))
 
 
 @task(
@@ -130,11 +81,18 @@ def upsert_event_data(events, response, year: int):
     retry_delay_seconds=15,
 )
 def fetch_events(year: int):
-    headers = prepare_event_headers(year)
-    response = fetch_event_data(headers, year)
-    events = process_event_response(response)
+    etag = run_step(prepare_event_etag, year)
+    response = run_step(fetch_event_data, etag, year, retry=True)
+    events = run_step(process_event_response, response)
 
     if events:
-        events = filter_events(events)
+        with metrics.timer("filter", "events"):
+            events = run_step(filter_events, events, get_filter_rules())
+
+    run_step(upsert_event_data, events, response, year, retry=True)
+    get_etag_cache(year).flush()
 
-    upsert_event_data(events, response, year)
+    if response.status_code not in (200, 304):
+        raise RuntimeError(
+            f"Events: Failed to fetch. Status Code: {response.status_code}"
+        )
@@ -1,19 +1,23 @@
-from time import sleep
+from time import monotonic
 
+from models.sync_plan import SeasonPlan
 from prefect import task
-from services.db_service import insert_sync_timestamp
-from tasks.sync_event_matches import sync_all_event_matches
-from tasks.sync_event_ranks import sync_all_event_rankings
+from services.checkpoint_journal import (
+    CheckpointJournal,
+    get_checkpoint_journal,
+)
+from services.db_service import get_event_keys_for_year, insert_sync_timestamp
+from services.etag_cache import get_etag_cache
+from settings import settings
+from tasks.export_parquet import flush_parquet_export
+from tasks.plan_sync import plan_season_sync
+from tasks.sync_event_matches import sync_event_matches
+from tasks.sync_event_ranks import sync_event_ranks
 from tasks.sync_events import fetch_events
 from tasks.sync_teams import fetch_teams
+from utils.task_graph import TaskGraph
 
-
-@task(
-    retries=3,
-    retry_delay_seconds=15,
-)
-def throttle_request(interval_secs=60):
-    sleep(interval_secs)
+EVENT_SYNCS = {"matches": sync_event_matches, "rankings": sync_event_ranks}
 
 
 @task(
@@ -24,6 +28,29 @@ def log_sync_timestamp(year: int):
     insert_sync_timestamp(year=year)
 
 
+def _event_units(
+    year: int, plan: SeasonPlan | None, journal: CheckpointJournal | None
+) -> list[tuple[str, str]]:
+    """Returns the `(data_type, event_key)` pairs left to sync, by event."""
+    synced = {
+        data_type: journal.done_units(year, data_type) if journal else set()
+        for data_type in EVENT_SYNCS
+    }
+    resumed = sum(len(event_keys) for event_keys in synced.values())
+    if resumed:
+        print(f"Checkpoint {year}: {resumed} event syncs already done.")
+
+    return [
+        (data_type, event_key)
+        for event_key in get_event_keys_for_year(year=year)
+        for data_type in EVENT_SYNCS
+        if event_key not in synced[data_type]
+        and (
+            plan is None or plan.should_sync(f"events/{event_key}/{data_type}")
+        )
+    ]
+
+
 @task(
     name="Sync TBA Data For Year",
     description="Syncs data from The Blue Alliance API for a given year",
@@ -31,15 +58,72 @@ def log_sync_timestamp(year: int):
     retries=3,
     retry_delay_seconds=15,
 )
-def sync_tba_data_for_year(year: int):
-    fetch_teams(year=year)
+def sync_tba_data_for_year(
+    year: int, plan: bool = True, checkpoint: bool = False
+) -> dict:
+    started = monotonic()
+    journal = get_checkpoint_journal() if checkpoint else None
+
+    season_plan = plan_season_sync(year) if plan else None
+    if season_plan and season_plan.skip_reason:
+        return {
+            "year": year,
+            "duration_secs": monotonic() - started,
+            "skipped": season_plan.skip_reason,
+        }
+
+    # Each event's matches and rankings start once teams and events are
+    # upserted, within per-stage limits.
+    graph = TaskGraph(
+        limits={
+            "matches": settings.EVENT_SYNC_CONCURRENCY,
+            "rankings": settings.EVENT_SYNC_CONCURRENCY,
+        }
+    )
 
-    fetch_events(year=year)
+    def finish(data_type: str, unit: str = "", then=None):
+        def on_done(_):
+            if journal:
+                # A resumed run skips the unit, so its ETags must be saved.
+                get_etag_cache(year).flush()
+                journal.mark_done(year, data_type, unit)
+            if then:
+                then()
 
-    sync_all_event_matches(year=year)
+        return on_done
 
-    sync_all_event_rankings(year=year)
+    def add_event_syncs():
+        for data_type, event_key in _event_units(year, season_plan, journal):
+            graph.add(
+                (data_type, event_key),
+                EVENT_SYNCS[data_type],
+                stage=data_type,
+                after=[key for key in ("teams", "events") if key in graph],
+                on_done=finish(data_type, event_key),
+                event_key=event_key,
+                year=year,
+            )
 
-    throttle_request()
+    for data_type, sync, then in (
+        ("teams", fetch_teams, None),
+        ("events", fetch_events, add_event_syncs),
+    ):
+        if journal and journal.is_done(year, data_type):
+            print(f"Checkpoint {year}: {data_type} already synced.")
+            if then:
+                then()
+            continue
+        graph.add(
+            data_type, sync, on_done=finish(data_type, then=then), year=year
+        )
+
+    # A failed unit raises out of graph.run, so the timestamp, which lets
+    # the planner skip settled data, is only written once all succeeded.
+    graph.run()
+    get_etag_cache(year).flush()
+
+    flush_parquet_export()
 
     log_sync_timestamp(year=year)
+
+    return {"year": year, "duration_secs": monotonic() - started}
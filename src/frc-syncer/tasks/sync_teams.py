@@ -1,30 +1,24 @@
-import os
-import time
+from collections import Counter
 
 import requests
-from prefect import task
-from models.tba.tba_page_etag import TBAPageEtag
 from models.tba.team import Team
-from services.db_service import (
-    get_tba_page_etag,
-    upsert_tba_page_etag,
-    upsert_teams,
-)
-
-HEADERS = {"X-TBA-Auth-Key": os.getenv("TBA_API_KEY")}
+from prefect import task
+from services.db_service import upsert_teams
+from services.etag_cache import get_etag_cache
+from services.metrics import metrics
+from services.tba_service import get_teams_page
+from settings import settings
+from utils.futures import submit_bounded
+from utils.steps import run_step
 
 
 @task(
-    name="Team Sync: Prepare Headers",
+    name="Team Sync: Prepare ETag",
     retries=3,
     retry_delay_seconds=15,
 )
-def prepare_team_headers(page_num, year: int):
-    etag = get_tba_page_etag(page_num=page_num, year=year, endpoint="teams")
-    headers = HEADERS.copy()
-    if etag:
-        headers["If-None-Match"] = etag.etag
-    return headers
+def prepare_team_etag(page_num, year: int) -> str | None:
+    return get_etag_cache(year).get("teams", page_num=page_num)
 
 
 @task(
@@ -32,10 +26,8 @@ def prepare_team_headers(page_num, year: int):
     retries=3,
     retry_delay_seconds=15,
 )
-def fetch_team_page_data(page_num, headers, year: int):
-    url = f"https://www.thebluealliance.com/api/v3/teams/{
-        year}/{page_num}"
-    return requests.get(url, headers=headers)
+def fetch_team_page_data(page_num, etag, year: int) -> requests.Response:
+    return get_teams_page(year, page_num, etag=etag)
 
 
 @task(
@@ -53,7 +45,8 @@ def process_team_page_response(page_num, response):
               response.status_code}"
         )
         return None
-    return [Team.from_tba(item) for item in response.json()]
+    with metrics.timer("parse", "teams"):
+        return [Team.from_tba(item) for item in response.json()]
 
 
 @task(name="Team Sync: Upsert Team Data", retries=3, retry_delay_seconds=15)
@@ -62,30 +55,39 @@ def upsert_team_data(page_num, teams, response, year: int):
         upsert_teams(teams)
         print(f"Team Page {page_num}: Fetched {len(teams)} teams.")
 
-    if response.status_code == 200:
-        existing_etag = get_tba_page_etag(
-            page_num=page_num, year=year, endpoint="teams"
-        )
-
-        etag = response.headers.get("ETag")
-        upsert_tba_page_etag(
-            TBAPageEtag(
-                id=existing_etag.id if existing_etag else None,
-                page_num=page_num,
-                etag=etag,
-                endpoint="teams",
-                year=year,
-            )
+    # Empty pages only mark the end of the list; remembering their ETag
+    # would turn them into 304s that look like unchanged pages.
+    if response.status_code == 200 and teams:
+        get_etag_cache(year).set(
+            "teams", response.headers.get("ETag"), page_num=page_num
         )
 
 
 @task(
-    name="Team Sync: Throttle Request",
+    name="Team Sync: Sync Team Page",
     retries=3,
     retry_delay_seconds=15,
 )
-def throttle_request(interval_secs=5):
-    time.sleep(interval_secs)
+def sync_team_page(page_num: int, year: int) -> str:
+    etag = run_step(prepare_team_etag, page_num, year)
+    response = run_step(fetch_team_page_data, page_num, etag, year, retry=True)
+    teams = run_step(process_team_page_response, page_num, response)
+    run_step(upsert_team_data, page_num, teams, response, year, retry=True)
+
+    if response.status_code == 304:
+        return "unchanged"
+    elif response.status_code == 404:
+        # TBA answers pages past the end with an empty list, but a replay
+        # never cached them. fetch_teams decides whether that is the end.
+        return "missing"
+    elif teams is None:
+        # Discovery stops at the first empty page, so a page that failed
+        # must fail the sync rather than end the list early.
+        raise RuntimeError(
+            f"Teams Page {page_num}: Failed to fetch. Status Code: "
+            f"{response.status_code}"
+        )
+    return "updated" if teams else "empty"
 
 
 @task(
@@ -97,17 +99,42 @@ def throttle_request(interval_secs=5):
     retry_delay_seconds=15,
 )
 def fetch_teams(year: int):
-    page_num = 0
+    etag_cache = get_etag_cache(year)
+    wave_size = max(settings.TEAM_PAGE_CONCURRENCY, 1)
+
+    # Pages with a stored ETag were non-empty last time, so the first wave
+    # covers all of them plus the page that should now be empty.
+    known_pages = etag_cache.page_nums("teams")
+    first_page = 0
+    end_page = max(known_pages) + 2 if known_pages else wave_size
+
+    statuses = Counter()
     while True:
-        headers = prepare_team_headers(page_num, year)
-        response = fetch_team_page_data(page_num, headers, year)
-        teams = process_team_page_response(page_num, response)
+        wave = submit_bounded(
+            sync_team_page,
+            range(first_page, end_page),
+            max_workers=settings.TEAM_PAGE_CONCURRENCY,
+            year=year,
+        )
+        statuses.update(wave.values())
 
-        if not teams:
-            # TODO: Fix to not break if etag page match and [] is returned
+        end = min(
+            (page for page, status in wave.items() if status == "empty"),
+            default=None,
+        )
+        missing = sorted(
+            page
+            for page, status in wave.items()
+            if status == "missing" and (end is None or page < end)
+        )
+        if missing:
+            raise RuntimeError(f"Teams: Pages {missing} were not found.")
+        if end is not None:
             break
+        first_page, end_page = end_page, end_page + wave_size
 
-        upsert_team_data(page_num, teams, response, year)
-
-        page_num += 1
-        throttle_request()
+    etag_cache.flush()
+    print(
+        f"Teams: {statuses['updated']} pages updated, "
+        f"{statuses['unchanged']} unchanged."
+    )
@@ -0,0 +1,35 @@
+from typing import Hashable, Iterable, Iterator
+
+from prefect import Task
+from prefect.futures import PrefectFuture, as_completed
+
+
+def iter_bounded(
+    task: Task, items: Iterable[Hashable], max_workers: int, **kwargs
+) -> Iterator[tuple[Hashable, PrefectFuture]]:
+    """Yields `(item, future)` as runs finish, `max_workers` at a time."""
+    in_flight = {}
+
+    def next_done():
+        future = next(as_completed(list(in_flight)))
+        # as_completed can fire before the final state is reported.
+        future.wait()
+        return in_flight.pop(future), future
+
+    for item in items:
+        if len(in_flight) >= max(max_workers, 1):
+            yield next_done()
+        in_flight[task.submit(item, **kwargs)] = item
+
+    while in_flight:
+        yield next_done()
+
+
+def submit_bounded(
+    task: Task, items: Iterable[Hashable], max_workers: int, **kwargs
+) -> dict:
+    """Like `iter_bounded`, but returns the results by item."""
+    return {
+        item: future.result()
+        for item, future in iter_bounded(task, items, max_workers, **kwargs)
+    }
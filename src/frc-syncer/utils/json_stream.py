@@ -0,0 +1,56 @@
+import codecs
+import json
+from typing import Iterable, Iterator
+
+_WHITESPACE = " \t\n\r"
+_DELIMITERS = _WHITESPACE + ",]"
+
+
+def iter_json_array(chunks: Iterable[bytes]) -> Iterator:
+    """Yields the items of a top-level JSON array as its bytes arrive."""
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    position = 0
+    opened = False
+
+    chunks = iter(chunks)
+    for chunk in chunks:
+        buffer = buffer[position:] + utf8.decode(chunk)
+        position = 0
+
+        while True:
+            while position < len(buffer) and buffer[position] in _WHITESPACE:
+                position += 1
+            if position == len(buffer):
+                break
+
+            char = buffer[position]
+            if not opened:
+                if char != "[":
+                    raise ValueError("Expected a JSON array")
+                opened = True
+                position += 1
+            elif char == ",":
+                position += 1
+            elif char == "]":
+                # Read to the end, so the source sees the whole body.
+                rest = buffer[position:][1:] + "".join(
+                    utf8.decode(chunk) for chunk in chunks
+                )
+                if rest.strip(_WHITESPACE):
+                    raise ValueError("Data after the JSON array")
+                return
+            else:
+                try:
+                    item, end = decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError:
+                    break  # The item continues in the next chunk.
+                if not isinstance(item, (dict, list, str)) and (
+                    end == len(buffer) or buffer[end] not in _DELIMITERS
+                ):
+                    break  # A number may continue in the next chunk.
+                yield item
+                position = end
+
+    raise ValueError("Unterminated JSON array")
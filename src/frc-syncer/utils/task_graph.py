@@ -0,0 +1,89 @@
+from collections import Counter
+from typing import Callable, Hashable, Iterable, NamedTuple
+
+from prefect import Task
+from prefect.futures import PrefectFuture, as_completed
+
+
+class _Node(NamedTuple):
+    task: Task
+    stage: str
+    after: frozenset
+    on_done: Callable | None
+    kwargs: dict
+
+
+class TaskGraph:
+    """Runs each task run once the runs it depends on have finished."""
+
+    def __init__(self, limits: dict[str, int] | None = None):
+        # Runs in flight per stage; stages without a limit run one at a time.
+        self._limits = limits or {}
+        self._pending: dict[Hashable, _Node] = {}
+        self._nodes: dict[Hashable, _Node] = {}
+        self._results: dict[Hashable, object] = {}
+        self._running: Counter = Counter()
+        self._in_flight: dict[PrefectFuture, Hashable] = {}
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._nodes
+
+    def add(
+        self,
+        key: Hashable,
+        task: Task,
+        stage: str | None = None,
+        after: Iterable[Hashable] = (),
+        on_done: Callable[[object], None] | None = None,
+        **kwargs,
+    ):
+        """Adds a run of `task` with `kwargs`, after the nodes in `after`.
+
+        `on_done` gets the run's result and may add more nodes, including
+        ones named in an earlier node's `after`.
+        """
+        if key in self._nodes:
+            raise ValueError(f"Duplicate task graph node: {key!r}")
+
+        node = _Node(
+            task, stage or str(key), frozenset(after), on_done, kwargs
+        )
+        self._nodes[key] = node
+        self._pending[key] = node
+
+    def _submit_ready(self):
+        for key, node in list(self._pending.items()):
+            if self._running[node.stage] >= max(
+                self._limits.get(node.stage, 1), 1
+            ):
+                continue
+            if not node.after.issubset(self._results):
+                continue
+            del self._pending[key]
+            self._running[node.stage] += 1
+            self._in_flight[node.task.submit(**node.kwargs)] = key
+
+    def run(self) -> dict[Hashable, object]:
+        """Runs every node and returns their results by key."""
+        while True:
+            self._submit_ready()
+            if not self._in_flight:
+                break
+
+            future = next(as_completed(list(self._in_flight)))
+            # as_completed can fire before the final state is reported.
+            future.wait()
+            key = self._in_flight.pop(future)
+            node = self._nodes[key]
+            self._running[node.stage] -= 1
+
+            self._results[key] = future.result()
+            if node.on_done:
+                node.on_done(self._results[key])
+
+        if self._pending:
+            # Waiting on nodes that were never added, or on each other.
+            raise RuntimeError(
+                f"Task graph nodes can never run: {list(self._pending)}"
+            )
+        return self._results
@@ -0,0 +1,21 @@
+import pytest
+from benchmarks.fake_supabase import FakeSupabaseClient
+from services import db_service, etag_cache
+
+
+@pytest.fixture
+def fake_db():
+    client = FakeSupabaseClient(table_keys=db_service.TABLE_KEYS)
+    db_service.set_client(client)
+    etag_cache.reset_etag_caches()
+    yield client
+    db_service.set_client(None)
+    etag_cache.reset_etag_caches()
+
+
+@pytest.fixture(scope="session")
+def prefect_server():
+    from prefect.testing.utilities import prefect_test_harness
+
+    with prefect_test_harness():
+        yield
@@ -0,0 +1,175 @@
+import json
+
+import pytest
+from benchmarks import payloads
+from prefect import Task
+from services import checkpoint_journal, tba_service
+from services.response_cache import CachedResponse
+from settings import settings
+
+YEAR = 2024
+
+
+class Client:
+    def __init__(self):
+        self.paths = []
+        self.failing_event = f"{YEAR}ev005"
+        self.failing_page = None
+        self.failing_page_status = 500
+        # Like a replay, which only has the pages up to the empty one.
+        self.cached_pages_only = False
+        self.failing_path = None
+
+    def get(self, url, headers=None, timeout=None, stream=False):
+        path = url.split("/api/v3/")[1]
+        self.paths.append(path)
+        if path == self.failing_path:
+            return CachedResponse(500)
+        kind, key = path.split("/")[:2]
+        if kind == "teams":
+            page_num = int(path.split("/")[-1])
+            if page_num == self.failing_page:
+                return CachedResponse(self.failing_page_status)
+            pages = payloads.generate_team_pages(YEAR, 600)
+            if self.cached_pages_only and page_num >= len(pages):
+                return CachedResponse(404)
+            body = pages[page_num] if page_num < len(pages) else []
+        elif kind == "events":
+            body = payloads.generate_events(YEAR, 8)
+        elif path.endswith("matches"):
+            if key == self.failing_event:
+                raise ConnectionError("interrupted")
+            body = payloads.generate_matches(key, 5)
+        else:
+            body = payloads.generate_rankings(key)
+
+        response = CachedResponse(200, json.dumps(body).encode(), etag=path)
+        response.iter_content = lambda chunk_size: iter([response.content])
+        return response
+
+
+@pytest.fixture
+def journaled_sync(fake_db, prefect_server, tmp_path, monkeypatch):
+    import flows.download_historic
+    import tasks.sync_event_matches
+    import tasks.sync_event_ranks
+    import tasks.sync_events
+    import tasks.sync_tba_year
+    import tasks.sync_teams
+
+    for module in (
+        tasks.sync_event_matches,
+        tasks.sync_event_ranks,
+        tasks.sync_events,
+        tasks.sync_tba_year,
+        tasks.sync_teams,
+    ):
+        for value in vars(module).values():
+            if isinstance(value, Task):
+                monkeypatch.setattr(value, "retries", 0)
+    monkeypatch.setattr(settings, "HISTORIC_SEASONS", [YEAR])
+    monkeypatch.setattr(settings, "EVENT_SYNC_CONCURRENCY", 1)
+    monkeypatch.setattr(settings, "CHECKPOINT_PATH", str(tmp_path / "cp.db"))
+    monkeypatch.setattr(checkpoint_journal, "_journal", None)
+
+    client = Client()
+    tba_service.set_client(client)
+    yield (
+        flows.download_historic.download_historic.with_options(retries=0),
+        client,
+    )
+    tba_service.set_client(None)
+
+
+def test_interrupted_sync_resumes(journaled_sync, fake_db):
+    download_historic, client = journaled_sync
+
+    with pytest.raises(Exception):
+        download_historic()
+
+    journal = checkpoint_journal.get_checkpoint_journal()
+    done = journal.done_units(YEAR, "matches")
+    assert journal.is_done(YEAR, "teams") and journal.is_done(YEAR, "events")
+    assert f"{YEAR}ev005" not in done and done
+    # Every event journaled as done has its ETag saved.
+    saved = {
+        row["endpoint"] for row in fake_db.tables["tba-pages-etags"].values()
+    }
+    assert {f"events/{key}/matches" for key in done} <= saved
+
+    client.paths.clear()
+    client.failing_event = None
+    download_historic()
+
+    assert not any(
+        path.startswith(("teams", "events")) for path in client.paths
+    )
+    assert {
+        path.split("/")[1] for path in client.paths if path.endswith("matches")
+    } == {row["key"] for row in fake_db.tables["events"].values()} - done
+    assert journal.done_units(YEAR, "matches") == set()
+
+
+@pytest.mark.parametrize("status", [500, 404])
+def test_failed_team_page_fails_the_sync(journaled_sync, status):
+    download_historic, client = journaled_sync
+    client.failing_page = 1
+    client.failing_page_status = status
+    client.cached_pages_only = True
+
+    with pytest.raises(Exception):
+        download_historic()
+
+    journal = checkpoint_journal.get_checkpoint_journal()
+    assert not journal.is_done(YEAR, "teams")
+    assert "teams/2024/1" in client.paths
+
+
+def test_uncached_team_pages_past_the_end_end_the_list(
+    journaled_sync, fake_db, monkeypatch
+):
+    download_historic, client = journaled_sync
+    monkeypatch.setattr(settings, "TEAM_PAGE_CONCURRENCY", 6)
+    client.failing_event = None
+    client.cached_pages_only = True
+
+    download_historic()
+
+    assert "teams/2024/5" in client.paths
+    assert len(fake_db.tables["teams"]) == 600
+
+
+@pytest.mark.parametrize("data_type", ["matches", "rankings"])
+def test_failed_event_response_is_not_journaled(journaled_sync, data_type):
+    download_historic, client = journaled_sync
+    client.failing_event = None
+    client.failing_path = f"event/{YEAR}ev005/{data_type}"
+
+    with pytest.raises(Exception):
+        download_historic()
+
+    journal = checkpoint_journal.get_checkpoint_journal()
+    assert f"{YEAR}ev005" not in journal.done_units(YEAR, data_type)
+    assert not journal.is_done(YEAR, "season")
+
+
+def test_failed_season_is_planned_again(journaled_sync, fake_db):
+    from tasks.plan_sync import plan_season_sync
+
+    download_historic, client = journaled_sync
+    client.failing_event = None
+    client.failing_path = f"event/{YEAR}ev005/matches"
+
+    with pytest.raises(Exception):
+        download_historic()
+
+    assert not fake_db.tables.get("tba-sync")
+    plan = plan_season_sync.fn(YEAR)
+    assert plan.should_sync(f"events/{YEAR}ev005/matches")
+
+    client.paths.clear()
+    client.failing_path = None
+    download_historic()
+
+    assert f"event/{YEAR}ev005/matches" in client.paths
+    assert plan_season_sync.fn(YEAR).skip_reason
@@ -0,0 +1,54 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+from threading import Barrier
+
+import orjson
+from services import db_service
+from settings import settings
+
+
+def test_importing_tasks_builds_no_client(tmp_path):
+    env = {
+        name: value
+        for name, value in os.environ.items()
+        if not name.startswith("SUPABASE_")
+    }
+    env["PYTHONPATH"] = str(Path(db_service.__file__).parents[1])
+    script = (
+        "import importlib, pkgutil, sys, tasks\n"
+        "for module in pkgutil.iter_modules(tasks.__path__):\n"
+        "    importlib.import_module(f'tasks.{module.name}')\n"
+        "from services import db_service\n"
+        "assert db_service._client is None\n"
+        "assert 'supabase' not in sys.modules\n"
+    )
+    subprocess.run(
+        [sys.executable, "-c", script], cwd=tmp_path, env=env, check=True
+    )
+
+
+def test_batches_are_bounded_by_rows_and_bytes(monkeypatch):
+    monkeypatch.setattr(settings, "DB_UPSERT_BATCH_ROWS", 30)
+    monkeypatch.setattr(settings, "DB_UPSERT_BATCH_BYTES", 1000)
+    rows = [{"key": f"{index:04d}", "pad": "x" * 80} for index in range(50)]
+
+    batches = db_service._batch_rows(rows)
+    assert [row for batch in batches for row in batch] == rows
+    assert len(batches) > 2
+    assert all(len(orjson.dumps(batch)) <= 1000 for batch in batches)
+
+    monkeypatch.setattr(settings, "DB_UPSERT_BATCH_BYTES", 1_000_000)
+    assert [len(batch) for batch in db_service._batch_rows(rows)] == [30, 20]
+
+
+def test_deferred_writes_of_events_run_side_by_side(monkeypatch):
+    # With one shared worker, the second event's write would wait for the
+    # first one and break the barrier.
+    barrier = Barrier(2, timeout=5)
+    monkeypatch.setattr(db_service, "_upsert_rows", lambda *_: barrier.wait())
+
+    first = db_service._defer_upsert_rows("alliance-score-breakdowns", [])
+    second = db_service._defer_upsert_rows("alliance-score-breakdowns", [])
+    db_service.wait_for_upserts(first + second)
@@ -0,0 +1,68 @@
+from services import etag_cache
+
+
+def stored_etags(fake_db) -> list[tuple]:
+    return sorted(
+        (row["endpoint"], row["page_num"], row["etag"])
+        for row in fake_db.tables.get("tba-pages-etags", {}).values()
+    )
+
+
+def test_flush_writes_changed_etags_once(fake_db):
+    cache = etag_cache.get_etag_cache(2024)
+    cache.set("teams", '"a"', page_num=0)
+    cache.set("events", '"b"')
+    cache.flush()
+    cache.flush()
+
+    assert stored_etags(fake_db) == [
+        ("events", None, '"b"'),
+        ("teams", 0, '"a"'),
+    ]
+    assert len(fake_db.calls) == 2  # the load and one upsert
+
+
+def test_changed_etag_updates_the_stored_row(fake_db):
+    cache = etag_cache.get_etag_cache(2024)
+    cache.set("teams", '"a"', page_num=0)
+    cache.flush()
+    cache.set("teams", '"b"', page_num=0)
+    cache.flush()
+
+    assert stored_etags(fake_db) == [("teams", 0, '"b"')]
+
+
+def test_new_etag_during_flush_updates_the_same_row(fake_db, monkeypatch):
+    cache = etag_cache.get_etag_cache(2024)
+    upsert = etag_cache.upsert_tba_page_etags
+    written = []
+
+    def upsert_while_changing(etags):
+        written.append([etag.etag for etag in etags])
+        if len(written) == 1:
+            # Another task stores a newer ETag and flushes mid-write.
+            cache.set("events", '"new"')
+            cache.flush()
+        return upsert(etags)
+
+    monkeypatch.setattr(
+        etag_cache, "upsert_tba_page_etags", upsert_while_changing
+    )
+    cache.set("events", '"old"')
+    cache.flush()
+    cache.flush()
+
+    assert written == [['"old"'], ['"new"']]
+    assert stored_etags(fake_db) == [("events", None, '"new"')]
+
+
+def test_reset_reloads_from_the_database(fake_db):
+    cache = etag_cache.get_etag_cache(2024)
+    cache.set("events", '"a"')
+    cache.flush()
+
+    etag_cache.reset_etag_caches()
+
+    reloaded = etag_cache.get_etag_cache(2024)
+    assert reloaded is not cache
+    assert reloaded.get("events") == '"a"'
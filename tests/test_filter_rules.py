@@ -0,0 +1,60 @@
+from benchmarks import payloads
+from models import filter_rules
+from models.filter_rules import FilterRules, get_filter_rules
+from models.tba.event import Event
+from models.tba.match import Match
+from settings import settings
+
+
+def events_with_divisions() -> list[Event]:
+    events = payloads.generate_events(2020, 3)
+    for event in events:
+        event["event_type_string"] = "Championship Finals"
+    events[0]["division_keys"] = ["2020carv", events[1]["key"]]
+    return [Event.from_tba(event) for event in events]
+
+
+def test_divisions_are_dropped_by_default():
+    rules = FilterRules(blacklisted_event_keys=frozenset({"2020carv"}))
+    events, dropped = rules.filter_events(events_with_divisions())
+
+    assert len(events) == 3
+    assert events[0].divisions == []
+    assert dropped == {"division": 2}
+
+
+def test_synced_divisions_skip_blacklisted_events():
+    rules = FilterRules(
+        blacklisted_event_keys=frozenset({"2020carv"}),
+        sync_event_divisions=True,
+    )
+    events, dropped = rules.filter_events(events_with_divisions())
+
+    assert [d.division_event_key for d in events[0].divisions] == [
+        events[1].key
+    ]
+    assert dropped == {"division": 1}
+
+
+def test_blacklisted_teams_are_dropped_from_match_rows():
+    rows = Match.rows_from_tba(payloads.generate_matches("2020ev000", 3))
+    team_key = rows.alliance_teams[0]["team_key"]
+    rules = FilterRules(blacklisted_team_keys=frozenset({team_key}))
+    kept, dropped = rules.filter_matches(rows)
+
+    assert dropped["blacklisted_team"] > 0
+    assert kept.alliance_teams == [
+        team for team in rows.alliance_teams if team["team_key"] != team_key
+    ]
+    assert kept.matches is rows.matches
+
+
+def test_rules_are_compiled_once_per_run(monkeypatch):
+    filter_rules.reset_filter_rules()
+    rules = get_filter_rules()
+    monkeypatch.setattr(settings, "BLACKLISTED_TEAM_KEYS", ["frc254"])
+    assert get_filter_rules() is rules
+
+    filter_rules.reset_filter_rules()
+    assert get_filter_rules().blacklisted_team_keys == {"frc254"}
+    filter_rules.reset_filter_rules()
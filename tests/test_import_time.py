@@ -0,0 +1,7 @@
+import pytest
+from benchmarks.import_time import MODULES, heavy_imports
+
+
+@pytest.mark.parametrize("module", MODULES)
+def test_imports_leave_out_heavy_modules(module):
+    assert heavy_imports(module) == []
@@ -0,0 +1,98 @@
+import pytest
+from models.tba.match import Match, MatchRows
+from models.tba.match_batch import MatchBatch
+
+
+def make_alliance(score: int, team_keys: list[str]) -> dict:
+    return {
+        "score": score,
+        "team_keys": team_keys,
+        "surrogate_team_keys": [],
+        "dq_team_keys": [],
+    }
+
+
+def make_match(event_key: str, number: int, breakdowns: bool = True) -> dict:
+    teams = [f"frc{number * 6 + offset}" for offset in range(6)]
+    return {
+        "key": f"{event_key}_qm{number}",
+        "comp_level": "qm",
+        "set_number": 1,
+        "match_number": number,
+        "winning_alliance": "red" if number % 2 else "blue",
+        "event_key": event_key,
+        "time": 1710000000 + number * 420,
+        "actual_time": 1710000060 + number * 420,
+        "predicted_time": 1710000030 + number * 420,
+        "post_result_time": 1710000300 + number * 420,
+        "alliances": {
+            "red": make_alliance(number, teams[:3]),
+            "blue": make_alliance(number + 1, teams[3:]),
+        },
+        "score_breakdown": (
+            {
+                color: {"autoPoints": number, "endGameRobot1": "Parked"}
+                for color in ("red", "blue")
+            }
+            if breakdowns
+            else None
+        ),
+    }
+
+
+def make_matches(count: int, breakdowns: bool = True) -> list[dict]:
+    return [
+        make_match("2024ev000", number, breakdowns)
+        for number in range(1, count + 1)
+    ]
+
+
+def model_rows(matches: list[dict]) -> MatchRows:
+    models = [Match.from_tba(match) for match in matches]
+    return MatchRows(
+        [match.to_db() for match in models],
+        [alliance.to_db() for match in models for alliance in match.alliances],
+        [
+            team.to_db()
+            for match in models
+            for alliance in match.alliances
+            for team in alliance.teams
+        ],
+    )
+
+
+def edge_case_matches() -> list[dict]:
+    matches = make_matches(3)
+    matches[0]["score_breakdown"] = None
+    matches[1]["actual_time"] = None
+    matches[1]["post_result_time"] = None
+    matches[1]["winning_alliance"] = ""
+    matches[2]["alliances"]["red"]["surrogate_team_keys"] = ["frc9998"]
+    matches[2]["alliances"]["blue"]["dq_team_keys"] = ["frc9999"]
+    del matches[2]["alliances"]["blue"]["score"]
+    return matches
+
+
+CASES = pytest.mark.parametrize(
+    "matches",
+    [
+        make_matches(50),
+        make_matches(20, breakdowns=False),
+        edge_case_matches(),
+        [],
+    ],
+    ids=["breakdowns", "no-breakdowns", "edge-cases", "empty"],
+)
+
+
+@CASES
+def test_rows_from_tba_matches_models(matches):
+    assert Match.rows_from_tba(matches) == model_rows(matches)
+
+
+@CASES
+def test_match_batch_rows_match_models(matches):
+    batch = MatchBatch.from_tba(matches)
+    assert MatchRows(
+        batch.matches, batch.alliances, batch.alliance_teams
+    ) == model_rows(matches)
@@ -0,0 +1,83 @@
+from threading import Event, Thread
+
+import pytest
+from services import db_service, parquet_sink
+from services.parquet_sink import SEASON_COLUMNS, ParquetSink
+from settings import settings
+
+pq = pytest.importorskip("pyarrow.parquet")
+
+
+def test_every_synced_table_has_a_season_column():
+    assert set(SEASON_COLUMNS) == set(db_service.TABLE_KEYS)
+
+
+def test_breakdowns_are_exported_by_season(tmp_path):
+    sink = ParquetSink(str(tmp_path))
+    sink.add(
+        "alliance-score-breakdowns",
+        [
+            {"alliance_key": "2024ev000_qm1_red", "score_breakdown": {"a": 1}},
+            {"alliance_key": "2023ev000_qm1_red", "score_breakdown": None},
+        ],
+        ("alliance_key",),
+    )
+    sink.flush()
+
+    table = pq.read_table(sink.path("alliance-score-breakdowns", 2024))
+    assert table.to_pylist() == [
+        {"alliance_key": "2024ev000_qm1_red", "score_breakdown": '{"a":1}'}
+    ]
+    assert sink.path("alliance-score-breakdowns", 2023).exists()
+
+
+def test_flushes_write_older_rows_first(tmp_path, monkeypatch):
+    sink = ParquetSink(str(tmp_path))
+    written = []
+    writing, release = Event(), Event()
+
+    def write(table, year, rows, keys):
+        if not writing.is_set():
+            writing.set()
+            release.wait(timeout=5)
+        written.append(rows[0]["name"])
+
+    monkeypatch.setattr(sink, "write", write)
+    row = {"key": "frc1", "name": "old"}
+    sink.add("teams", [row], ("key",))
+    first = Thread(target=sink.flush)
+    first.start()
+    writing.wait(timeout=5)
+
+    sink.add("teams", [{**row, "name": "new"}], ("key",))
+    second = Thread(target=sink.flush)
+    second.start()
+    second.join(timeout=0.2)
+    release.set()
+    first.join()
+    second.join()
+
+    assert written == ["old", "new"]
+
+
+def test_unknown_tables_are_rejected(tmp_path):
+    sink = ParquetSink(str(tmp_path))
+    with pytest.raises(ValueError, match="tba-sync"):
+        sink.add("tba-sync", [{"year": 2024}], ("year",))
+
+
+@pytest.mark.parametrize("split", [False, True])
+def test_export_reads_breakdowns_only_when_split(
+    fake_db, prefect_server, tmp_path, monkeypatch, split
+):
+    from flows.export_parquet import export_parquet
+
+    monkeypatch.setattr(settings, "PARQUET_EXPORT_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "SPLIT_SCORE_BREAKDOWNS", split)
+    monkeypatch.setattr(parquet_sink, "_sink", None)
+
+    export_parquet([2024])
+
+    tables = {call["table"] for call in fake_db.calls}
+    assert "matches" in tables
+    assert ("alliance-score-breakdowns" in tables) == split
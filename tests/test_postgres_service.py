@@ -0,0 +1,81 @@
+import os
+
+import pytest
+from benchmarks import payloads
+from models.tba.event import Event
+from models.tba.match import Match
+from models.tba.ranking import Ranking
+from models.tba.team import Team
+from services import db_service
+from settings import settings
+
+pytestmark = pytest.mark.postgres
+
+
+def sync(year: int):
+    event_key = f"{year}ev000"
+    db_service.upsert_teams(
+        [Team.from_tba(team) for team in payloads.generate_teams(year, 9999)]
+    )
+    events = payloads.generate_events(year, 4, seed=1)
+    events[0]["division_keys"] = [events[1]["key"], events[2]["key"]]
+    db_service.upsert_events([Event.from_tba(event) for event in events])
+    db_service.upsert_event_matches(
+        [
+            Match.from_tba(match)
+            for match in payloads.generate_matches(event_key, 10)
+        ]
+    )
+    db_service.upsert_event_rankings(
+        [
+            Ranking.from_tba(rank, event_key)
+            for rank in payloads.generate_rankings(event_key)["rankings"]
+        ]
+    )
+
+
+@pytest.fixture
+def postgres(monkeypatch):
+    dsn = os.environ.get("TEST_POSTGRES_DSN")
+    if not dsn:
+        pytest.skip("TEST_POSTGRES_DSN is not set")
+    pytest.importorskip("psycopg")
+    from services import postgres_service
+
+    monkeypatch.setattr(settings, "DB_BACKEND", "postgres")
+    monkeypatch.setattr(settings, "POSTGRES_DSN", dsn)
+    connection = postgres_service._connection()
+    # Rolled back, so the database is left as it was.
+    with connection.transaction(force_rollback=True):
+        yield connection
+    connection.close()
+
+
+def count_rows(connection) -> dict[str, int]:
+    from psycopg import sql
+
+    return {
+        table: connection.execute(
+            sql.SQL("SELECT count(*) FROM {}").format(sql.Identifier(table))
+        ).fetchone()[0]
+        for table in db_service.TABLE_KEYS
+    }
+
+
+def test_upserts_are_idempotent(fake_db, postgres, monkeypatch):
+    monkeypatch.setattr(settings, "SPLIT_SCORE_BREAKDOWNS", True)
+    monkeypatch.setattr(settings, "DB_BACKEND", "supabase")
+    sync(2024)
+    expected = {
+        table: len(fake_db.tables.get(table, []))
+        for table in db_service.TABLE_KEYS
+    }
+    monkeypatch.setattr(settings, "DB_BACKEND", "postgres")
+
+    # Every ON CONFLICT target needs a unique constraint on its columns.
+    before = count_rows(postgres)
+    sync(2024)
+    first = count_rows(postgres)
+    sync(2024)
+    assert count_rows(postgres) == first
+    assert {table: first[table] - before[table] for table in first} == expected
@@ -0,0 +1,110 @@
+from types import SimpleNamespace
+
+import pytest
+from services import tba_service
+from services.response_cache import CachedResponse
+from settings import settings
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, secs: float):
+        self.slept.append(secs)
+        self.now += secs
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(
+        tba_service,
+        "time",
+        SimpleNamespace(monotonic=clock.monotonic, sleep=clock.sleep),
+    )
+    monkeypatch.setattr(settings, "TBA_INITIAL_REQUESTS_PER_SEC", 2)
+    monkeypatch.setattr(settings, "TBA_MIN_REQUESTS_PER_SEC", 0.2)
+    monkeypatch.setattr(settings, "TBA_MAX_REQUESTS_PER_SEC", 10)
+    monkeypatch.setattr(settings, "TBA_REQUEST_BURST", 5)
+    monkeypatch.setattr(settings, "TBA_NOT_MODIFIED_COST", 0.25)
+    return clock
+
+
+def unthrottled_requests(limiter, clock) -> int:
+    count = 0
+    while True:
+        limiter.acquire()
+        if clock.slept:
+            return count
+        count += 1
+
+
+def test_burst_then_refill_rate(clock):
+    limiter = tba_service.RateLimiter()
+
+    assert unthrottled_requests(limiter, clock) == 5
+    assert clock.slept == [pytest.approx(0.5)]
+
+
+def test_not_modified_refund_is_capped_at_the_burst(clock):
+    limiter = tba_service.RateLimiter()
+    limiter.acquire()
+    for _ in range(20):
+        limiter.on_response(304, None)
+
+    assert limiter._tokens == 5
+    assert unthrottled_requests(limiter, clock) == 5
+
+
+def test_rate_limited_halves_the_rate_and_waits(clock):
+    limiter = tba_service.RateLimiter()
+    limiter.on_response(429, 3)
+
+    assert limiter.rate == 1
+    limiter.acquire()
+    assert clock.slept == [3]
+
+
+def test_rate_stays_within_bounds(clock):
+    limiter = tba_service.RateLimiter()
+    for _ in range(500):
+        limiter.on_response(200, None)
+    assert limiter.rate == 10
+
+    for _ in range(20):
+        limiter.on_response(429, None)
+    assert limiter.rate == 0.2
+
+
+class Client:
+    def __init__(self):
+        self.etags = []
+
+    def get(self, url, headers=None, timeout=None, stream=False):
+        self.etags.append((headers or {}).get("If-None-Match"))
+        response = CachedResponse(200, b"[]", etag="E1")
+        response.headers["Cache-Control"] = "max-age=61"
+        return response
+
+
+def test_fresh_paths_only_skip_requests_for_their_etag(clock, monkeypatch):
+    client = Client()
+    monkeypatch.setattr(tba_service, "_client", client)
+    monkeypatch.setattr(tba_service, "_fresh_until", {})
+    monkeypatch.setattr(tba_service, "rate_limiter", tba_service.RateLimiter())
+
+    def status(etag: str) -> int:
+        return tba_service._request(
+            "events/2024", 2024, etag, False
+        ).status_code
+
+    assert status("E0") == 200
+    # A retry with the old ETag, say after a failed upsert, must refetch.
+    assert status("E0") == 200
+    assert status("E1") == 304
+    assert client.etags == ["E0", "E0"]
@@ -0,0 +1,28 @@
+import flows.replay_cache
+import pytest
+from settings import settings
+
+
+@pytest.mark.parametrize("fails", [False, True])
+def test_replay_restores_network_access(
+    fake_db, prefect_server, tmp_path, monkeypatch, fails
+):
+    replayed = []
+
+    def sync(year, plan):
+        replayed.append(settings.TBA_OFFLINE_REPLAY)
+        if fails:
+            raise RuntimeError("sync failed")
+
+    monkeypatch.setattr(settings, "RESPONSE_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(flows.replay_cache, "sync_tba_data_for_year", sync)
+    replay_cache = flows.replay_cache.replay_cache.with_options(retries=0)
+
+    if fails:
+        with pytest.raises(RuntimeError, match="sync failed"):
+            replay_cache([2024])
+    else:
+        replay_cache([2024])
+
+    assert replayed == [True]
+    assert settings.TBA_OFFLINE_REPLAY is False
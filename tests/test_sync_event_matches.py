@@ -0,0 +1,143 @@
+import json
+import time
+
+import pytest
+from benchmarks import payloads
+from requests.structures import CaseInsensitiveDict
+from services import db_service, tba_service
+from services.metrics import metrics
+from services.response_cache import CachedResponse
+from settings import settings
+from tasks.sync_event_matches import (
+    fetch_event_matches,
+    process_event_matches_response,
+)
+
+
+class SlowResponse:
+    def __init__(self, body: bytes, status_code: int = 200):
+        self.status_code = status_code
+        self.headers = CaseInsensitiveDict({"ETag": 'W/"v1"'})
+        self._body = body
+        self.calls = []
+
+    def iter_content(self, chunk_size: int):
+        for start in range(0, len(self._body), chunk_size):
+            time.sleep(0.02)
+            yield self._body[start:][:chunk_size]
+        self.calls.append("read")
+
+    def close(self):
+        self.calls.append("close")
+
+
+class Client:
+    def __init__(self, response: SlowResponse):
+        self.response = response
+
+    def get(self, url, headers=None, timeout=None, stream=False):
+        return self.response
+
+
+@pytest.fixture
+def tba():
+    def serve(response: SlowResponse):
+        tba_service.set_client(Client(response))
+
+    metrics.reset()
+    yield serve
+    tba_service.set_client(None)
+
+
+def test_fetch_time_includes_the_body(tba):
+    tba(SlowResponse(b"[" + b" " * 200_000 + b"]"))
+
+    response = tba_service.stream_event_matches("2024ev000")
+    assert len(b"".join(response.iter_body())) == 200_002
+    response.close()
+    response.close()
+
+    fetch = metrics.report()["stages"]["fetch:matches"]
+    assert fetch["count"] == 1
+    assert fetch["sum_secs"] >= 0.04
+
+
+def test_fetch_event_matches_streams_into_the_database(fake_db, tba):
+    matches = payloads.generate_matches("2024ev000", 30)
+    tba(SlowResponse(json.dumps(matches).encode()))
+
+    assert fetch_event_matches.fn("2024ev000", None) == (30, 'W/"v1"')
+    assert len(fake_db.tables["matches"]) == 30
+
+
+def test_fetch_event_matches_not_modified(fake_db, tba):
+    response = SlowResponse(b"", status_code=304)
+    tba(response)
+
+    assert fetch_event_matches.fn("2024ev000", 'W/"v1"') == (None, None)
+    assert "matches" not in fake_db.tables
+    # Read to the end, so the connection goes back to the pool.
+    assert response.calls == ["read", "close"]
+
+
+def test_streamed_matches_are_cached_for_replay(
+    fake_db, tba, tmp_path, monkeypatch
+):
+    matches = payloads.generate_matches("2024ev000", 30)
+    tba(SlowResponse(json.dumps(matches).encode() + b"\n"))
+    monkeypatch.setattr(settings, "RESPONSE_CACHE_DIR", str(tmp_path))
+
+    assert fetch_event_matches.fn("2024ev000", None) == (30, 'W/"v1"')
+    fake_db.tables.clear()
+    tba_service.set_client(None)
+    monkeypatch.setattr(settings, "TBA_OFFLINE_REPLAY", True)
+
+    assert fetch_event_matches.fn("2024ev000", None) == (30, 'W/"v1"')
+    assert len(fake_db.tables["matches"]) == 30
+
+
+def matches_response(event_key: str) -> CachedResponse:
+    matches = payloads.generate_matches(event_key, 10, seed=1)
+    return CachedResponse(200, json.dumps(matches).encode())
+
+
+def test_failed_event_keeps_its_deferred_errors(fake_db, monkeypatch):
+    monkeypatch.setattr(settings, "SPLIT_SCORE_BREAKDOWNS", True)
+    upsert_batch = db_service._upsert_batch
+
+    def fail_first_event(table, rows):
+        if table.startswith("alliance-") and "2024ev000" in repr(rows[0]):
+            raise RuntimeError(f"{table} failed")
+        upsert_batch(table, rows)
+
+    monkeypatch.setattr(db_service, "_upsert_batch", fail_first_event)
+
+    # The deferred breakdowns of the failed event fail too.
+    with pytest.raises(RuntimeError, match="^alliance-teams failed"):
+        process_event_matches_response(
+            "2024ev000", matches_response("2024ev000")
+        )
+    assert (
+        process_event_matches_response(
+            "2024ev001", matches_response("2024ev001")
+        )
+        == 10
+    )
+    assert len(fake_db.tables["alliance-score-breakdowns"]) == 20
+
+
+def test_deferred_failure_is_raised_by_its_event(fake_db, monkeypatch):
+    monkeypatch.setattr(settings, "SPLIT_SCORE_BREAKDOWNS", True)
+    upsert_batch = db_service._upsert_batch
+
+    def fail_breakdowns(table, rows):
+        if table == "alliance-score-breakdowns":
+            raise RuntimeError("breakdowns failed")
+        upsert_batch(table, rows)
+
+    monkeypatch.setattr(db_service, "_upsert_batch", fail_breakdowns)
+
+    with pytest.raises(RuntimeError, match="breakdowns failed"):
+        process_event_matches_response(
+            "2024ev000", matches_response("2024ev000")
+        )
@@ -0,0 +1,105 @@
+import time
+from threading import Lock
+
+import pytest
+from prefect import flow, task
+from utils.task_graph import TaskGraph
+
+_lock = Lock()
+_log: list[tuple[str, str]] = []
+_running = {"now": 0, "max": 0}
+
+
+@task
+def step(name: str, secs: float = 0.0) -> str:
+    with _lock:
+        _log.append(("start", name))
+        _running["now"] += 1
+        _running["max"] = max(_running["max"], _running["now"])
+    time.sleep(secs)
+    with _lock:
+        _log.append(("end", name))
+        _running["now"] -= 1
+    return name
+
+
+@task
+def fail(name: str):
+    raise RuntimeError(f"{name} failed")
+
+
+def run(graph: TaskGraph) -> dict:
+    @flow
+    def run_graph():
+        return graph.run()
+
+    return run_graph()
+
+
+@pytest.fixture(autouse=True)
+def log(prefect_server):
+    _log.clear()
+    _running.update(now=0, max=0)
+    return _log
+
+
+def test_nodes_run_after_their_dependencies(log):
+    graph = TaskGraph(limits={"leaves": 4})
+    graph.add("teams", step, name="teams", secs=0.05)
+    graph.add("events", step, name="events")
+    for name in ("a", "b"):
+        graph.add(
+            name, step, stage="leaves", after=["teams", "events"], name=name
+        )
+
+    assert run(graph) == {key: key for key in ("teams", "events", "a", "b")}
+    for name in ("a", "b"):
+        assert log.index(("end", "teams")) < log.index(("start", name))
+        assert log.index(("end", "events")) < log.index(("start", name))
+
+
+def test_on_done_adds_nodes(log):
+    graph = TaskGraph()
+    graph.add(
+        "events",
+        step,
+        on_done=lambda result: graph.add(
+            "matches", step, after=["events"], name=f"{result} matches"
+        ),
+        name="events",
+    )
+
+    assert run(graph)["matches"] == "events matches"
+
+
+@pytest.mark.parametrize("limit, expected", [(None, 1), (2, 2)])
+def test_stage_limits(limit, expected):
+    graph = TaskGraph(limits={"matches": limit} if limit else {})
+    for index in range(5):
+        graph.add(index, step, stage="matches", name=str(index), secs=0.05)
+
+    assert len(run(graph)) == 5
+    assert _running["max"] == expected
+
+
+def test_failures_stop_dependent_nodes(log):
+    graph = TaskGraph()
+    graph.add("events", fail, name="events")
+    graph.add("matches", step, after=["events"], name="matches")
+
+    with pytest.raises(RuntimeError, match="events failed"):
+        run(graph)
+    assert ("start", "matches") not in log
+
+
+@pytest.mark.parametrize(
+    "after", [{"a": ["missing"], "b": ["a"]}, {"a": ["b"], "b": ["a"]}]
+)
+def test_stuck_nodes_raise(after):
+    graph = TaskGraph()
+    graph.add("root", step, name="root")
+    for key, dependencies in after.items():
+        graph.add(key, step, after=dependencies, name=key)
+
+    with pytest.raises(RuntimeError, match=r"\['a', 'b'\]"):
+        run(graph)